@@ -13,12 +13,22 @@ from dataclasses import dataclass
 from openai import OpenAI
 
 # Import scrapers
+try:
+    from scrapers.destinations import TOP_DESTINATIONS
+except ImportError:
+    from .scrapers.destinations import TOP_DESTINATIONS
+
 try:
     from scrapers.scraper_manager import ScraperManager
     SCRAPERS_AVAILABLE = True
 except ImportError:
-    print("⚠️  Scrapers not available, using fallback data")
-    SCRAPERS_AVAILABLE = False
+    try:
+        # Imported as part of the src package, e.g. by the long-lived worker
+        from .scrapers.scraper_manager import ScraperManager
+        SCRAPERS_AVAILABLE = True
+    except ImportError:
+        print("⚠️  Scrapers not available, using fallback data")
+        SCRAPERS_AVAILABLE = False
 
 @dataclass
 class QuizResponse:
@@ -44,7 +54,7 @@ class UserPreferences:
     cultural_interest: str
 
 class DeepSeekAgent:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, scraper_manager: Optional["ScraperManager"] = None):
         """Initialize the DeepSeek agent with API key"""
         self.client = OpenAI(
             api_key=api_key,
@@ -52,21 +62,15 @@ class DeepSeekAgent:
         )
         
         # Initialize scraper manager if available
-        if SCRAPERS_AVAILABLE:
+        if scraper_manager is not None:
+            self.scraper_manager = scraper_manager
+        elif SCRAPERS_AVAILABLE:
             self.scraper_manager = ScraperManager()
         else:
             self.scraper_manager = None
         
         # Top travel destinations by category
-        self.top_destinations = {
-            "cultural": ["Kyoto, Japan", "Rome, Italy", "Istanbul, Turkey", "Marrakech, Morocco", "Varanasi, India"],
-            "adventure": ["Reykjavik, Iceland", "Queenstown, New Zealand", "Banff, Canada", "Interlaken, Switzerland", "Patagonia, Chile"],
-            "relaxed": ["Bali, Indonesia", "Santorini, Greece", "Maldives", "Tuscany, Italy", "Kyoto, Japan"],
-            "luxury": ["Dubai, UAE", "Singapore", "Tokyo, Japan", "Paris, France", "New York, USA"],
-            "budget": ["Bangkok, Thailand", "Hanoi, Vietnam", "Mexico City, Mexico", "Budapest, Hungary", "Porto, Portugal"],
-            "food": ["Tokyo, Japan", "Bangkok, Thailand", "Paris, France", "Istanbul, Turkey", "Mexico City, Mexico"],
-            "nature": ["Banff, Canada", "Interlaken, Switzerland", "Queenstown, New Zealand", "Reykjavik, Iceland", "Patagonia, Chile"]
-        }
+        self.top_destinations = {style: list(locations) for style, locations in TOP_DESTINATIONS.items()}
     
     def scrape_activities(self, location: str) -> Dict[str, Any]:
         """
@@ -382,6 +386,12 @@ class DeepSeekAgent:
             response_text = completion.choices[0].message.content
             recommendations = json.loads(response_text)
             
+            # Fetch weather for every destination in one concurrent batch up front
+            if self.scraper_manager:
+                self.scraper_manager.prefetch_weather(
+                    [rec.get("name", rec.get("locationName", "")) for rec in recommendations]
+                )
+            
             # Enhance recommendations with real scraped data
             enhanced_recommendations = []
             for rec in recommendations:
@@ -525,6 +535,41 @@ def create_sample_responses() -> List[QuizResponse]:
     
     return responses
 
+def dispatch_api_call(agent: DeepSeekAgent, method: str, parsed_data: Dict[str, Any]) -> Any:
+    """Run an API method on an existing agent and return the JSON-ready result"""
+    if method == "analyze_response":
+        response = QuizResponse(**parsed_data)
+        return agent.analyze_quiz_response(response)
+        
+    elif method == "generate_preferences":
+        user_id = parsed_data["userId"]
+        responses_data = parsed_data["responses"]
+        responses = [QuizResponse(**r) for r in responses_data]
+        result = agent.generate_user_preferences(user_id, responses)
+        return {
+            "userId": result.user_id,
+            "travelStyle": result.travel_style,
+            "preferredActivities": result.preferred_activities,
+            "accommodationPreference": result.accommodation_preference,
+            "budgetPriority": result.budget_priority,
+            "pacePreference": result.pace_preference,
+            "foodPreference": result.food_preference,
+            "socialPreference": result.social_preference,
+            "adventureLevel": result.adventure_level,
+            "culturalInterest": result.cultural_interest
+        }
+        
+    elif method == "suggest_locations":
+        preferences = UserPreferences(**parsed_data)
+        return agent.suggest_travel_locations(preferences)
+        
+    elif method == "generate_itinerary":
+        location = parsed_data["location"]
+        preferences = UserPreferences(**parsed_data["preferences"])
+        return agent.generate_itinerary(location, preferences)
+        
+    raise ValueError(f"Unknown method: {method}")
+
 def handle_api_call(method: str, data: str):
     """Handle API calls from the Node.js server"""
     api_key = os.getenv("DEEPSEEK_API_KEY")
@@ -535,43 +580,7 @@ def handle_api_call(method: str, data: str):
     
     try:
         parsed_data = json.loads(data)
-        
-        if method == "analyze_response":
-            response = QuizResponse(**parsed_data)
-            result = agent.analyze_quiz_response(response)
-            return json.dumps(result)
-            
-        elif method == "generate_preferences":
-            user_id = parsed_data["userId"]
-            responses_data = parsed_data["responses"]
-            responses = [QuizResponse(**r) for r in responses_data]
-            result = agent.generate_user_preferences(user_id, responses)
-            return json.dumps({
-                "userId": result.user_id,
-                "travelStyle": result.travel_style,
-                "preferredActivities": result.preferred_activities,
-                "accommodationPreference": result.accommodation_preference,
-                "budgetPriority": result.budget_priority,
-                "pacePreference": result.pace_preference,
-                "foodPreference": result.food_preference,
-                "socialPreference": result.social_preference,
-                "adventureLevel": result.adventure_level,
-                "culturalInterest": result.cultural_interest
-            })
-            
-        elif method == "suggest_locations":
-            preferences = UserPreferences(**parsed_data)
-            result = agent.suggest_travel_locations(preferences)
-            return json.dumps(result)
-            
-        elif method == "generate_itinerary":
-            location = parsed_data["location"]
-            preferences = UserPreferences(**parsed_data["preferences"])
-            result = agent.generate_itinerary(location, preferences)
-            return json.dumps(result)
-            
-        else:
-            return json.dumps({"error": f"Unknown method: {method}"})
+        return json.dumps(dispatch_api_call(agent, method, parsed_data))
             
     except Exception as e:
         return json.dumps({"error": str(e)})
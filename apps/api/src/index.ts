@@ -1,3 +1,8 @@
+import {
+  type ChildProcessWithoutNullStreams,
+  spawn,
+} from "node:child_process";
+import { createInterface } from "node:readline";
 import { serve } from "@hono/node-server";
 import { Hono } from "hono";
 import { cors } from "hono/cors";
@@ -691,6 +696,108 @@ function getPreferredActivities(travelStyle: string): string[] {
   );
 }
 
+// Long-lived Python worker (python -m src.worker) speaking newline-delimited
+// JSON, so interpreter startup and scraper caches are shared across requests
+let pythonWorker: ChildProcessWithoutNullStreams | null = null;
+let nextPythonRequestId = 0;
+const pendingPythonRequests = new Map<
+  string,
+  { reject: (error: Error) => void; resolve: (result: any) => void }
+>();
+
+function getPythonWorker(): ChildProcessWithoutNullStreams {
+  if (pythonWorker) return pythonWorker;
+
+  const worker = spawn(
+    "bash",
+    ["-c", "source venv/bin/activate && exec python3 -m src.worker"],
+    { cwd: process.cwd() },
+  );
+
+  createInterface({ input: worker.stdout }).on("line", (line) => {
+    let message: any;
+    try {
+      message = JSON.parse(line);
+    } catch (_e) {
+      console.log("Python worker stdout:", line);
+      return;
+    }
+
+    const pending = pendingPythonRequests.get(message.id);
+    if (!pending) return;
+    pendingPythonRequests.delete(message.id);
+
+    if (message.error) {
+      pending.reject(new Error(message.error));
+    } else {
+      pending.resolve(message.result);
+    }
+  });
+
+  worker.stderr.on("data", (data: Buffer) => {
+    console.log("Python stderr:", data.toString());
+  });
+
+  // Fail everything in flight and let the next call spawn a fresh worker
+  const failPending = (reason: string) => {
+    if (pythonWorker === worker) pythonWorker = null;
+    for (const pending of pendingPythonRequests.values()) {
+      pending.reject(new Error(reason));
+    }
+    pendingPythonRequests.clear();
+  };
+
+  worker.on("close", (code: number) => {
+    console.log("Python worker exited with code:", code);
+    failPending("Python worker exited");
+  });
+
+  // Without these, a failed spawn or a write to a dead worker (EPIPE) would
+  // be an unhandled 'error' event and take down the API process
+  worker.on("error", (error: Error) => {
+    console.error("Python worker error:", error);
+    failPending(`Python worker error: ${error.message}`);
+  });
+
+  worker.stdin.on("error", (error: Error) => {
+    console.error("Python worker stdin error:", error);
+    failPending(`Python worker stdin error: ${error.message}`);
+  });
+
+  pythonWorker = worker;
+  return worker;
+}
+
+// Send a request to the Python worker and wait for its response
+function callPythonWorker(
+  method: string,
+  params: any,
+  timeoutMs = 120_000,
+): Promise<any> {
+  const id = String(++nextPythonRequestId);
+  const worker = getPythonWorker();
+
+  return new Promise((resolve, reject) => {
+    const timer = setTimeout(() => {
+      pendingPythonRequests.delete(id);
+      reject(new Error(`Python worker timed out on ${method}`));
+    }, timeoutMs);
+
+    pendingPythonRequests.set(id, {
+      reject: (error) => {
+        clearTimeout(timer);
+        reject(error);
+      },
+      resolve: (result) => {
+        clearTimeout(timer);
+        resolve(result);
+      },
+    });
+
+    worker.stdin.write(`${JSON.stringify({ id, method, params })}\n`);
+  });
+}
+
 // Get user preferences
 app.get("/api/user/:userId/preferences", async (c) => {
   const userId = c.req.param("userId");
@@ -818,133 +925,59 @@ app.post("/api/user/:userId/itinerary", async (c) => {
 
     // Use real scraper data to generate itinerary
     try {
-      const { spawn } = await import("node:child_process");
-
-      console.log("🔍 Calling Python scraper for:", locationName);
-      console.log("🔍 Current working directory:", process.cwd());
-      console.log("🔍 Python command:", "python3", [
-        "-m",
-        "src.scrapers.scraper_manager",
-        "generate_itinerary",
-        JSON.stringify({
-          location: locationName,
-          user_preferences: {
-            adventure_level: user.preferences.adventureLevel,
-            cultural_interest: user.preferences.culturalInterest,
-            food_preference: user.preferences.foodPreference,
-            pace_preference: user.preferences.pacePreference,
-            preferred_activities: user.preferences.preferredActivities,
-            travel_style: user.preferences.travelStyle,
-          },
-        }),
-      ]);
-
-      // Call the Python scraper manager to get real data
-      const pythonProcess = spawn(
-        "bash",
-        [
-          "-c",
-          `source venv/bin/activate && python3 -m src.scrapers.scraper_manager generate_itinerary '${JSON.stringify(
-            {
-              location: locationName,
-              user_preferences: {
-                adventure_level: user.preferences.adventureLevel,
-                cultural_interest: user.preferences.culturalInterest,
-                food_preference: user.preferences.foodPreference,
-                pace_preference: user.preferences.pacePreference,
-                preferred_activities: user.preferences.preferredActivities,
-                travel_style: user.preferences.travelStyle,
-              },
-            },
-          )}'`,
-        ],
-        {
-          cwd: process.cwd(), // Ensure we're in the right directory
+      console.log("🔍 Calling Python worker for:", locationName);
+
+      const itineraryData = await callPythonWorker("generate_itinerary", {
+        location: locationName,
+        user_preferences: {
+          adventure_level: user.preferences.adventureLevel,
+          cultural_interest: user.preferences.culturalInterest,
+          food_preference: user.preferences.foodPreference,
+          pace_preference: user.preferences.pacePreference,
+          preferred_activities: user.preferences.preferredActivities,
+          travel_style: user.preferences.travelStyle,
         },
-      );
-
-      let realItineraryData = "";
-      let errorOutput = "";
-
-      pythonProcess.stdout.on("data", (data: Buffer) => {
-        realItineraryData += data.toString();
-      });
-
-      pythonProcess.stderr.on("data", (data: Buffer) => {
-        errorOutput += data.toString();
-        console.log("Python stderr:", data.toString());
-      });
-
-      await new Promise((resolve, _reject) => {
-        pythonProcess.on("close", (code: number) => {
-          console.log("Python process exited with code:", code);
-          console.log("Python stdout:", realItineraryData);
-          console.log("Python stderr:", errorOutput);
-
-          if (code === 0) {
-            try {
-              const itineraryData = JSON.parse(realItineraryData);
-              resolve(itineraryData);
-            } catch (_e) {
-              console.log("Error parsing Python output, using fallback data");
-              resolve(null);
-            }
-          } else {
-            console.log("Python scraper failed, using fallback data");
-            resolve(null);
-          }
-        });
       });
 
       // If we got real data, use it
-      if (realItineraryData && !errorOutput.includes("Error")) {
-        try {
-          // Find the JSON object in the output (it might be mixed with other text)
-          const jsonMatch = realItineraryData.match(/\{[\s\S]*\}/);
-          if (jsonMatch) {
-            const itineraryData = JSON.parse(jsonMatch[0]);
-
-            const realItinerary = {
-              activities: {
-                events: itineraryData.events || [],
-                local_insights: itineraryData.local_insights || [],
-                main_attractions: itineraryData.attractions || [],
-                restaurants: itineraryData.restaurants || {},
-                transportation: itineraryData.transportation_info || {},
-                weather: itineraryData.weather_conditions || {},
-              },
-              createdAt: new Date(),
-              itineraryData: {
-                afternoon:
-                  itineraryData.afternoon_schedule ||
-                  "Explore cultural sites and local cuisine",
-                evening:
-                  itineraryData.evening_schedule ||
-                  "Experience evening activities and local culture",
-                morning:
-                  itineraryData.morning_schedule ||
-                  "Start your day with local attractions",
-              },
-              locationName,
-              total_cost: itineraryData.total_estimated_cost || { total: 100 },
-              travel_tips: itineraryData.travel_tips || [],
-              userId,
-            };
-
-            itineraries.set(`${userId}_${locationName}`, realItinerary);
-
-            return c.json({
-              itinerary: realItinerary,
-              locationName,
-              userId,
-            });
-          }
-        } catch (e) {
-          console.log("Error parsing real itinerary data, using fallback:", e);
-        }
+      if (itineraryData) {
+        const realItinerary = {
+          activities: {
+            events: itineraryData.events || [],
+            local_insights: itineraryData.local_insights || [],
+            main_attractions: itineraryData.attractions || [],
+            restaurants: itineraryData.restaurants || {},
+            transportation: itineraryData.transportation_info || {},
+            weather: itineraryData.weather_conditions || {},
+          },
+          createdAt: new Date(),
+          itineraryData: {
+            afternoon:
+              itineraryData.afternoon_schedule ||
+              "Explore cultural sites and local cuisine",
+            evening:
+              itineraryData.evening_schedule ||
+              "Experience evening activities and local culture",
+            morning:
+              itineraryData.morning_schedule ||
+              "Start your day with local attractions",
+          },
+          locationName,
+          total_cost: itineraryData.total_estimated_cost || { total: 100 },
+          travel_tips: itineraryData.travel_tips || [],
+          userId,
+        };
+
+        itineraries.set(`${userId}_${locationName}`, realItinerary);
+
+        return c.json({
+          itinerary: realItinerary,
+          locationName,
+          userId,
+        });
       }
-    } catch (_e) {
-      console.log("Error calling Python scraper, using fallback data");
+    } catch (e) {
+      console.log("Error calling Python worker, using fallback data:", e);
     }
 
     // Fallback to enhanced mock data
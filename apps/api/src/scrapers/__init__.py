@@ -10,13 +10,17 @@ try:
     from .reddit import RedditScraper
     from .weather import WeatherScraper
     from .transportation import TransportationScraper
+    from .cache import LRUCache
+    from .http_client import HttpClient
 
     __all__ = [
         'ScraperManager',
         'WikipediaScraper',
         'RedditScraper',
         'WeatherScraper',
-        'TransportationScraper'
+        'TransportationScraper',
+        'LRUCache',
+        'HttpClient'
     ]
 except ImportError as e:
     print(f"Warning: Could not import all scrapers: {e}")
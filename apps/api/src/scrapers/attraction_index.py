@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Attraction Index for Lumo Travel Recommendations
+Local SQLite store of attractions, intros and history/culture sections built
+offline from a Wikipedia dump, so cataloged cities need no live scraping
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .persistent_cache import get_cache_dir
+
+def get_index_path() -> Path:
+    """Where the attraction index lives, overridable with LUMO_ATTRACTION_INDEX"""
+    return Path(os.getenv("LUMO_ATTRACTION_INDEX") or get_cache_dir() / "attraction_index.db")
+
+def normalize_city(city: str) -> str:
+    """Key cities the way the scrapers name them: 'Kyoto, Japan' -> 'kyoto'"""
+    return " ".join(city.split(',')[0].replace('_', ' ').split()).lower()
+
+class AttractionIndex:
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else get_index_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        self._local = threading.local()
+        conn = self._connection()
+        with conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS cities (
+                    city TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    built_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS attractions (
+                    city TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    category TEXT,
+                    description TEXT,
+                    PRIMARY KEY (city, position)
+                );
+                CREATE TABLE IF NOT EXISTS sections (
+                    city TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    heading TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    PRIMARY KEY (city, position)
+                );
+            """)
+
+    @classmethod
+    def open_default(cls) -> Optional["AttractionIndex"]:
+        """
+        Open the index at the default path if one has been built, else None
+        """
+        path = get_index_path()
+        if not path.exists():
+            return None
+        try:
+            return cls(str(path))
+        except sqlite3.Error as e:
+            print(f"⚠️  Attraction index unavailable: {e}")
+            return None
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def _query(self, sql: str, params: tuple) -> Optional[list]:
+        try:
+            return self._connection().execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"Error reading attraction index: {e}")
+            return None
+
+    def has_city(self, city: str) -> bool:
+        rows = self._query("SELECT 1 FROM cities WHERE city = ?", (normalize_city(city),))
+        return bool(rows)
+
+    def get_attractions(self, city: str, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get a city's indexed attractions in page order, or None if the city isn't indexed
+        """
+        if not self.has_city(city):
+            return None
+
+        rows = self._query(
+            "SELECT name, url, category, description FROM attractions WHERE city = ? ORDER BY position LIMIT ?",
+            (normalize_city(city), -1 if limit is None else limit)
+        )
+        if rows is None:
+            return None
+        return [
+            {'name': name, 'url': url, 'category': category, 'description': description}
+            for name, url, category, description in rows
+        ]
+
+    def get_sections(self, city: str) -> Optional[List[Tuple[str, str]]]:
+        """
+        Get a city's (heading, first paragraph) sections, or None if the city isn't indexed
+        """
+        if not self.has_city(city):
+            return None
+
+        rows = self._query(
+            "SELECT heading, text FROM sections WHERE city = ? ORDER BY position",
+            (normalize_city(city),)
+        )
+        return None if rows is None else [(heading, text) for heading, text in rows]
+
+    def write_city(
+        self,
+        city: str,
+        title: str,
+        attractions: List[Dict[str, Any]],
+        sections: List[Tuple[str, str]]
+    ) -> None:
+        """Replace everything indexed for a city in one transaction"""
+        key = normalize_city(city)
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM attractions WHERE city = ?", (key,))
+            conn.execute("DELETE FROM sections WHERE city = ?", (key,))
+            conn.executemany(
+                "INSERT INTO attractions (city, position, name, url, category, description) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (key, i, item['name'], item['url'], item.get('category'), item.get('description'))
+                    for i, item in enumerate(attractions)
+                ]
+            )
+            conn.executemany(
+                "INSERT INTO sections (city, position, heading, text) VALUES (?, ?, ?, ?)",
+                [(key, i, heading, text) for i, (heading, text) in enumerate(sections)]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO cities (city, title, built_at) VALUES (?, ?, ?)",
+                (key, title, time.time())
+            )
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
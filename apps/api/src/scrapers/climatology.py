@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Climatology for Lumo Travel Recommendations
+Builds a compact table of monthly temperature and precipitation normals per
+destination, with each month scored for travel comfort and the best and worst
+months worked out ahead of time, so best-time lookups are a dict access.
+
+Rebuild the bundled table from apps/api with:
+    python -m src.scrapers.climatology
+    python -m src.scrapers.climatology normals.json --output climatology.json
+"""
+
+import argparse
+import csv
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .geocoding import normalize_location
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+NORMALS_PATH = DATA_DIR / "climate_normals.csv"
+CLIMATOLOGY_PATH = DATA_DIR / "climatology.json"
+
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+
+# Months within this many points of a city's best month count as the best time
+BEST_MARGIN = 10
+
+# Months scoring below this are worth avoiding
+AVOID_SCORE = 45
+
+def month_score(high: float, precip: float) -> int:
+    """
+    Score a month 0-100 for sightseeing: highs of 20-27°C and little rain score best
+    """
+    if high < 20:
+        warmth = max(0.0, (high - 5) / 15)
+    elif high > 27:
+        warmth = max(0.0, (38 - high) / 11)
+    else:
+        warmth = 1.0
+    dryness = max(0.0, 1 - precip / 250)
+    return round(100 * (0.6 * warmth + 0.4 * dryness))
+
+def month_ranges(months: List[int]) -> List[str]:
+    """
+    Name runs of consecutive months, wrapping around the new year:
+    [0, 1, 10, 11] -> ['November-February']
+    """
+    if not months:
+        return []
+    if len(months) == 12:
+        return ["Year-round"]
+
+    chosen = set(months)
+    # Start from a month whose predecessor isn't chosen, so a run over December isn't split
+    start = next(m for m in range(12) if m in chosen and (m - 1) % 12 not in chosen)
+
+    ranges, run = [], []
+    for offset in range(12):
+        month = (start + offset) % 12
+        if month in chosen:
+            run.append(month)
+        elif run:
+            ranges.append(run)
+            run = []
+    if run:
+        ranges.append(run)
+
+    return [
+        MONTHS[run[0]] if len(run) == 1 else f"{MONTHS[run[0]]}-{MONTHS[run[-1]]}"
+        for run in ranges
+    ]
+
+def load_normals(path: str) -> Dict[str, List[Dict[str, float]]]:
+    """
+    Read monthly normals from a CSV with location, month, temp_high_c, temp_low_c and
+    precip_mm columns, or a JSON list of such rows. Returns 12 months per location.
+    """
+    with open(path, encoding='utf-8') as f:
+        rows = json.load(f) if str(path).endswith('.json') else list(csv.DictReader(f))
+
+    normals: Dict[str, List[Optional[Dict[str, float]]]] = {}
+    for row in rows:
+        months = normals.setdefault(row['location'], [None] * 12)
+        months[int(row['month']) - 1] = {
+            'high': float(row['temp_high_c']),
+            'low': float(row['temp_low_c']),
+            'precip': float(row['precip_mm'])
+        }
+
+    complete = {}
+    for location, months in normals.items():
+        if None in months:
+            print(f"⚠️  Skipping {location}: normals missing for some months")
+        else:
+            complete[location] = months
+    return complete
+
+def summarize(location: str, months: List[Dict[str, float]]) -> Dict[str, Any]:
+    """Score a location's months and describe its best and worst times to visit"""
+    scores = [month_score(month['high'], month['precip']) for month in months]
+    top = max(scores)
+
+    best = [m for m, score in enumerate(scores) if score >= top - BEST_MARGIN]
+    avoid = [m for m, score in enumerate(scores) if score < AVOID_SCORE and m not in best]
+
+    low_high = round(min(months[m]['high'] for m in best))
+    high_high = round(max(months[m]['high'] for m in best))
+    highs = f"{low_high}°C" if low_high == high_high else f"{low_high}-{high_high}°C"
+    best_rain = sum(months[m]['precip'] for m in best) / len(best)
+    reason = f"Highs of {highs} with about {best_rain:.0f} mm of rain a month"
+
+    return {
+        "name": location,
+        "high": [month['high'] for month in months],
+        "low": [month['low'] for month in months],
+        "precip": [month['precip'] for month in months],
+        "score": scores,
+        "best_months": month_ranges(best),
+        "reason": reason,
+        "avoid_months": month_ranges(avoid) or "None",
+        "avoid_reason": _avoid_reason([months[m] for m in avoid])
+    }
+
+def _avoid_reason(months: List[Dict[str, float]]) -> str:
+    if not months:
+        return "No major weather concerns"
+
+    hottest = max(month['high'] for month in months)
+    coldest = min(month['high'] for month in months)
+    wettest = max(month['precip'] for month in months)
+
+    concerns = []
+    if hottest > 30:
+        concerns.append(f"hot, with highs up to {hottest:.0f}°C")
+    if coldest < 10:
+        concerns.append(f"cold, with highs around {coldest:.0f}°C")
+    if wettest > 150:
+        concerns.append(f"wet, with up to {wettest:.0f} mm of rain a month")
+    if not concerns:
+        return "Less comfortable weather than the rest of the year"
+
+    text = " and ".join(concerns)
+    return text[0].upper() + text[1:]
+
+def build_table(normals: Dict[str, List[Dict[str, float]]]) -> Dict[str, Dict[str, Any]]:
+    """Summaries keyed by normalized location name"""
+    return {normalize_location(location): summarize(location, months) for location, months in normals.items()}
+
+class Climatology:
+    def __init__(self, table: Dict[str, Dict[str, Any]]):
+        self.table = dict(table)
+
+        # Also answer for the bare city name when only one entry has it
+        cities: Dict[str, List[str]] = {}
+        for key in table:
+            cities.setdefault(key.split(',')[0], []).append(key)
+        for city, keys in cities.items():
+            if len(keys) == 1:
+                self.table.setdefault(city, table[keys[0]])
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "Climatology":
+        """Load a built table, or an empty one if it is missing or unreadable"""
+        try:
+            with open(path or CLIMATOLOGY_PATH, encoding='utf-8') as f:
+                return cls(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Climatology table unavailable: {e}")
+            return cls({})
+
+    def get(self, location: str) -> Optional[Dict[str, Any]]:
+        return self.table.get(normalize_location(location))
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+_default_climatology: Optional[Climatology] = None
+_default_climatology_lock = threading.Lock()
+
+def get_default_climatology() -> Climatology:
+    """
+    Get the bundled climatology table, loaded once per process
+    """
+    global _default_climatology
+    with _default_climatology_lock:
+        if _default_climatology is None:
+            _default_climatology = Climatology.load()
+        return _default_climatology
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Build the climatology table from monthly climate normals")
+    parser.add_argument("normals", nargs="?", default=str(NORMALS_PATH),
+                        help="CSV or JSON of monthly normals (default: the bundled climate_normals.csv)")
+    parser.add_argument("--output", default=str(CLIMATOLOGY_PATH), help="Where to write the table")
+    args = parser.parse_args(argv)
+
+    table = build_table(load_normals(args.normals))
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(table, f, ensure_ascii=False, separators=(',', ':'))
+        f.write('\n')
+
+    print(f"💾 Wrote climatology for {len(table)} locations to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Destinations for Lumo Travel Recommendations
+The curated catalog of top destinations offered to travelers, by travel style
+"""
+
+from typing import List
+
+# Top travel destinations by category
+TOP_DESTINATIONS = {
+    "cultural": ["Kyoto, Japan", "Rome, Italy", "Istanbul, Turkey", "Marrakech, Morocco", "Varanasi, India"],
+    "adventure": ["Reykjavik, Iceland", "Queenstown, New Zealand", "Banff, Canada", "Interlaken, Switzerland", "Patagonia, Chile"],
+    "relaxed": ["Bali, Indonesia", "Santorini, Greece", "Maldives", "Tuscany, Italy", "Kyoto, Japan"],
+    "luxury": ["Dubai, UAE", "Singapore", "Tokyo, Japan", "Paris, France", "New York, USA"],
+    "budget": ["Bangkok, Thailand", "Hanoi, Vietnam", "Mexico City, Mexico", "Budapest, Hungary", "Porto, Portugal"],
+    "food": ["Tokyo, Japan", "Bangkok, Thailand", "Paris, France", "Istanbul, Turkey", "Mexico City, Mexico"],
+    "nature": ["Banff, Canada", "Interlaken, Switzerland", "Queenstown, New Zealand", "Reykjavik, Iceland", "Patagonia, Chile"]
+}
+
+def catalog_locations() -> List[str]:
+    """Every cataloged destination once, in catalog order"""
+    return list(dict.fromkeys(location for locations in TOP_DESTINATIONS.values() for location in locations))
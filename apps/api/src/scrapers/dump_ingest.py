@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Dump Ingestion for Lumo Travel Recommendations
+Builds the local attraction index from a Wikipedia XML dump (pages-articles,
+plain or .bz2, or any subset of one) for the destination catalog. The dump is
+streamed with an incremental parser, so memory stays flat however large it is.
+
+Run from apps/api with:
+    python -m src.scrapers.dump_ingest enwiki-latest-pages-articles.xml.bz2
+    python -m src.scrapers.dump_ingest subset.xml --location "Kyoto, Japan"
+"""
+
+import argparse
+import bz2
+import html
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import quote
+
+from .attraction_index import AttractionIndex
+from .destinations import catalog_locations
+from .wikipedia import WikipediaScraper
+
+_COMMENT = re.compile(r'<!--.*?-->', re.S)
+_REF = re.compile(r'<ref[^>]*/>|<ref[^>]*>.*?</ref>', re.S | re.I)
+_TEMPLATE = re.compile(r'\{\{[^{}]*\}\}')
+_TABLE = re.compile(r'\{\|.*?\|\}', re.S)
+_FILE_LINK = re.compile(r'\[\[(?:File|Image):[^\[\]]*(?:\[\[[^\[\]]*\]\][^\[\]]*)*\]\]', re.I)
+_LINK = re.compile(r'\[\[([^\[\]|]*)(?:\|([^\[\]]*))?\]\]')
+_EXTERNAL_LINK = re.compile(r'\[https?://[^\s\]]+\s*([^\]]*)\]')
+_TAG = re.compile(r'<[^>]+>')
+_HEADING = re.compile(r'^(={2,6})\s*(.+?)\s*\1\s*$', re.M)
+
+# Characters MediaWiki leaves unescaped in /wiki/ paths
+_URL_SAFE = "/:@!$()*,;'~"
+
+# Link prefixes that point outside the article namespace
+_NAMESPACES = {
+    'file', 'image', 'category', 'template', 'wikipedia', 'wp', 'help', 'portal',
+    'special', 'talk', 'user', 'draft', 'module', 'mediawiki', 'wikt', 'wiktionary',
+    'commons', 'meta', 'voy', 'mw'
+}
+
+def normalize_title(title: str) -> str:
+    """Normalize a page title the way MediaWiki does: no fragment, spaces, first letter upper"""
+    title = " ".join(title.split('#', 1)[0].replace('_', ' ').split())
+    return title[:1].upper() + title[1:]
+
+def iter_pages(path: str) -> Iterator[Tuple[str, Optional[str], str]]:
+    """
+    Stream (title, redirect target, wikitext) for every article in a dump.
+    Each page is cleared from the tree once read, so memory stays constant.
+    """
+    opener = bz2.open if path.endswith('.bz2') else open
+    with opener(path, 'rb') as dump:
+        context = ET.iterparse(dump, events=('start', 'end'))
+        _, root = next(context)
+        title, namespace, redirect, text = None, '0', None, ''
+
+        for event, elem in context:
+            if event != 'end':
+                continue
+
+            tag = elem.tag.rsplit('}', 1)[-1]
+            if tag == 'title':
+                title = elem.text or ''
+            elif tag == 'ns':
+                namespace = elem.text
+            elif tag == 'redirect':
+                redirect = elem.get('title')
+            elif tag == 'text':
+                text = elem.text or ''
+            elif tag == 'page':
+                if title and namespace == '0':
+                    yield title, redirect, text
+                title, namespace, redirect, text = None, '0', None, ''
+                root.clear()
+
+def scan_pages(path: str, titles: Set[str], max_passes: int = 3) -> Iterator[Tuple[Set[str], str, str]]:
+    """
+    Yield (requested titles, page title, wikitext) for the wanted pages, following
+    redirects. A redirect whose target was already streamed past is picked up by
+    another pass, up to max_passes.
+    """
+    pending: Dict[str, Set[str]] = {}
+    for title in titles:
+        pending.setdefault(normalize_title(title), set()).add(title)
+
+    missing = 0
+    for scan in range(max_passes):
+        if scan:
+            print(f"🔁 Pass {scan + 1} for {len(pending)} redirected pages")
+
+        redirected = set()
+        for title, redirect, text in iter_pages(path):
+            requested = pending.pop(title, None)
+            if requested is None:
+                continue
+            if redirect:
+                target = normalize_title(redirect)
+                pending.setdefault(target, set()).update(requested)
+                redirected.add(target)
+            else:
+                yield requested, title, text
+
+        # Only redirect targets that came up after their page went by are worth another pass
+        missing += len([title for title in pending if title not in redirected])
+        pending = {title: requested for title, requested in pending.items() if title in redirected}
+        if not pending:
+            break
+
+    missing += len(pending)
+    if missing:
+        print(f"⚠️  {missing} pages not found in dump")
+
+def strip_wikitext(text: str) -> str:
+    """Reduce wikitext to plain text: no templates, refs, tables, files or markup"""
+    text = _COMMENT.sub('', text)
+    text = _REF.sub('', text)
+
+    # Templates nest, so remove innermost ones until none are left
+    previous = None
+    while previous != text:
+        previous = text
+        text = _TEMPLATE.sub('', text)
+
+    text = _TABLE.sub('', text)
+    text = _FILE_LINK.sub('', text)
+    text = _LINK.sub(lambda m: m.group(2) or ('' if _is_namespaced(m.group(1)) else m.group(1)), text)
+    text = _EXTERNAL_LINK.sub(r'\1', text)
+    text = text.replace("'''", '').replace("''", '')
+    text = _TAG.sub('', text)
+    return html.unescape(text)
+
+def wikitext_paragraphs(text: str) -> List[str]:
+    """Plain-text paragraphs of a wikitext fragment, skipping lists and table rows"""
+    paragraphs = []
+    for block in re.split(r'\n\s*\n', strip_wikitext(text)):
+        lines = [line.strip() for line in block.splitlines()]
+        lines = [line for line in lines if line and line[0] not in '*#:;|!{}']
+        if lines:
+            paragraphs.append(' '.join(lines))
+    return paragraphs
+
+def wikitext_lead(text: str) -> str:
+    """The intro: everything before the first heading"""
+    match = _HEADING.search(text)
+    return text[:match.start()] if match else text
+
+def wikitext_sections(text: str) -> List[Tuple[str, str]]:
+    """(heading, first paragraph) for level 2 and 3 headings directly followed by text"""
+    headings = list(_HEADING.finditer(text))
+    sections = []
+    for i, heading in enumerate(headings):
+        if len(heading.group(1)) > 3:
+            continue
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        paragraphs = wikitext_paragraphs(text[heading.end():end])
+        if paragraphs:
+            sections.append((strip_wikitext(heading.group(2)).strip(), paragraphs[0]))
+    return sections
+
+def wikitext_links(text: str) -> List[Tuple[str, str]]:
+    """(label, target) of every article link, in page order"""
+    links = []
+    for match in _LINK.finditer(_COMMENT.sub('', text)):
+        target = match.group(1).strip()
+        if not target or target.startswith('#') or _is_namespaced(target):
+            continue
+        label = strip_wikitext(match.group(2) or target).strip()
+        if label:
+            links.append((label, normalize_title(target)))
+    return links
+
+def _is_namespaced(target: str) -> bool:
+    """Whether a link points at another namespace or another language's wiki"""
+    if ':' not in target:
+        return False
+    prefix = target.split(':', 1)[0].strip().lower()
+    return prefix in _NAMESPACES or (len(prefix) <= 3 and prefix.isalpha())
+
+def build_index(
+    dump_path: str,
+    index: AttractionIndex,
+    locations: List[str],
+    max_candidates: int = 50,
+    base_url: str = "https://en.wikipedia.org"
+) -> int:
+    """
+    Index attractions, intros and sections for the given locations from a dump.
+    Returns the number of cities indexed.
+    """
+    scraper = WikipediaScraper(base_url=base_url)
+    cities = {normalize_title(location.split(',')[0].strip()): location for location in locations}
+
+    # Pass 1: city articles give the attraction candidates and the sections
+    print(f"📖 Scanning {dump_path} for {len(cities)} cities")
+    city_pages = {}
+    for requested, title, text in scan_pages(dump_path, set(cities)):
+        for city_title in requested:
+            city_pages[city_title] = (
+                title,
+                _attraction_candidates(scraper, text, city_title, max_candidates),
+                wikitext_sections(text)
+            )
+            print(f"✅ {city_title}: {len(city_pages[city_title][1])} attraction candidates")
+
+    # Pass 2: each candidate's article gives its intro
+    targets = {target for _, candidates, _ in city_pages.values() for target, _ in candidates}
+    print(f"📖 Scanning {dump_path} for {len(targets)} attraction intros")
+    intros = {}
+    for requested, _, text in scan_pages(dump_path, targets):
+        intro = scraper._pick_description(wikitext_paragraphs(wikitext_lead(text)))
+        for target in requested:
+            intros[target] = intro
+
+    for city_title, (title, candidates, sections) in city_pages.items():
+        attractions = [dict(attraction, description=intros.get(target)) for target, attraction in candidates]
+        index.write_city(cities[city_title], title, attractions, sections)
+
+    for city_title in set(cities) - set(city_pages):
+        print(f"⚠️  {city_title} not found in dump")
+
+    print(f"💾 Indexed {len(city_pages)} cities into {index.path}")
+    return len(city_pages)
+
+def _attraction_candidates(
+    scraper: WikipediaScraper,
+    text: str,
+    city: str,
+    max_candidates: int
+) -> List[Tuple[str, Dict[str, str]]]:
+    """
+    Filter a city article's links with the scraper's attraction rules,
+    returning (target title, attraction) pairs deduplicated by URL
+    """
+    links = [(label, target) for label, target in wikitext_links(text) if len(label) > 3]
+    decisions = scraper.classify_links([label for label, _ in links], city)
+
+    candidates = []
+    seen_urls = set()
+    for (label, target), (include, category) in zip(links, decisions):
+        url = f"{scraper.base_url}/wiki/{quote(target.replace(' ', '_'), safe=_URL_SAFE)}"
+        if include and url not in seen_urls:
+            seen_urls.add(url)
+            candidates.append((target, {'name': label, 'url': url, 'category': category}))
+            if len(candidates) >= max_candidates:
+                break
+    return candidates
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Build the local attraction index from a Wikipedia XML dump")
+    parser.add_argument("dump", help="pages-articles dump (.xml or .xml.bz2), or a subset of one")
+    parser.add_argument("--index", help="Index database path (default: $LUMO_ATTRACTION_INDEX or the cache directory)")
+    parser.add_argument("--location", action="append", dest="locations",
+                        help="Location to index, e.g. 'Kyoto, Japan' (repeatable; default: the destination catalog)")
+    parser.add_argument("--max-candidates", type=int, default=50, help="Attractions kept per city")
+    args = parser.parse_args(argv)
+
+    index = AttractionIndex(args.index)
+    build_index(args.dump, index, args.locations or catalog_locations(), max_candidates=args.max_candidates)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Geocoding for Lumo Travel Recommendations
+Coordinates for destinations from a bundled gazetteer, then a persistent cache
+of geocoding results, so a city is geocoded over the network at most once
+"""
+
+import json
+import math
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, Optional
+
+from .cache import LRUCache
+from .http_client import HttpClient, get_default_client
+from .persistent_cache import SQLiteCache
+from .request_memo import memoize
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / "data" / "gazetteer.json"
+
+GEOCODE_URL = "http://api.openweathermap.org/geo/1.0/direct"
+
+# Coordinates never change, but a failed lookup may succeed later
+MISSING_TTL = 24 * 3600
+
+def normalize_location(location: str) -> str:
+    """
+    Key locations so spelling variants share an entry:
+    'Reykjavík,  Iceland' -> 'reykjavik, iceland'
+    """
+    text = unicodedata.normalize('NFKD', location)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    parts = [' '.join(part.split()) for part in text.lower().split(',')]
+    return ', '.join(part for part in parts if part)
+
+def haversine_km(a: Dict[str, float], b: Dict[str, float]) -> float:
+    """Great-circle distance in km between two {'lat', 'lon'} points"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (a['lat'], a['lon'], b['lat'], b['lon']))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+class Geocoder:
+    def __init__(
+        self,
+        http_client: Optional[HttpClient] = None,
+        store: Optional[SQLiteCache] = None,
+        gazetteer_path: Optional[str] = None
+    ):
+        self.http = http_client or get_default_client()
+        self.store = store
+        self.memory = LRUCache(max_entries=1024, max_bytes=1024 * 1024, ttl=30 * 24 * 3600)
+        self.gazetteer = self._load_gazetteer(Path(gazetteer_path) if gazetteer_path else GAZETTEER_PATH)
+
+    def _load_gazetteer(self, path: Path) -> Dict[str, Dict[str, float]]:
+        """
+        Index the bundled coordinates by full name and, when unambiguous, by city alone
+        """
+        try:
+            with open(path, encoding='utf-8') as f:
+                places = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Gazetteer unavailable: {e}")
+            return {}
+
+        gazetteer = {}
+        cities: Dict[str, list] = {}
+        for name, coords in places.items():
+            key = normalize_location(name)
+            gazetteer[key] = {'lat': coords['lat'], 'lon': coords['lon']}
+            cities.setdefault(key.split(',')[0], []).append(key)
+
+        for city, keys in cities.items():
+            if len(keys) == 1:
+                gazetteer.setdefault(city, gazetteer[keys[0]])
+        return gazetteer
+
+    def lookup(self, location: str, api_key: Optional[str] = None) -> Optional[Dict[str, float]]:
+        """
+        Get {'lat', 'lon'} for a location from the gazetteer or the caches, geocoding
+        over the network only on a miss and only when an api_key is given
+        """
+        key = normalize_location(location)
+        if not key:
+            return None
+
+        if key in self.gazetteer:
+            return self.gazetteer[key]
+
+        cached = self._cached(key)
+        if cached is not None:
+            return cached.get('coords')
+
+        if not api_key:
+            return None
+
+        return memoize(('geocode', key), lambda: self._geocode(location, key, api_key))
+
+    def _cached(self, key: str) -> Optional[Dict[str, Optional[Dict[str, float]]]]:
+        """The stored entry for a key: {'coords': ...} with coords None for a known miss"""
+        entry = self.memory.get(key)
+        if entry is not None:
+            return entry
+
+        if self.store:
+            stored = self.store.get_entry(key)
+            if stored:
+                stored_at, entry = stored
+                if entry.get('coords') is not None or time.time() - stored_at < MISSING_TTL:
+                    self._remember(key, entry, persist=False)
+                    return entry
+        return None
+
+    def _geocode(self, location: str, key: str, api_key: str) -> Optional[Dict[str, float]]:
+        try:
+            params = {
+                'q': location,
+                'limit': 1,
+                'appid': api_key
+            }
+            response = self.http.get(GEOCODE_URL, params=params)
+            response.raise_for_status()
+
+            data = response.json()
+            coords = {'lat': data[0]['lat'], 'lon': data[0]['lon']} if data else None
+        except Exception as e:
+            print(f"Error getting coordinates for {location}: {e}")
+            return None
+
+        self._remember(key, {'coords': coords})
+        return coords
+
+    def _remember(self, key: str, entry: Dict[str, Optional[Dict[str, float]]], persist: bool = True) -> None:
+        ttl = None if entry.get('coords') is not None else MISSING_TTL
+        self.memory.set(key, entry, ttl=ttl)
+        if persist and self.store:
+            self.store.set(key, entry)
+
+    def distance_km(self, a: str, b: str) -> Optional[float]:
+        """Distance between two known locations, without any network lookups"""
+        coords_a, coords_b = self.lookup(a), self.lookup(b)
+        if coords_a is None or coords_b is None:
+            return None
+        return haversine_km(coords_a, coords_b)
+
+_default_geocoder: Optional[Geocoder] = None
+_default_geocoder_lock = threading.Lock()
+
+def get_default_geocoder() -> Geocoder:
+    """
+    Get the process-wide geocoder used by scrapers that weren't given one
+    """
+    global _default_geocoder
+    with _default_geocoder_lock:
+        if _default_geocoder is None:
+            _default_geocoder = Geocoder()
+        return _default_geocoder
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+HTML Parsing for Lumo Travel Recommendations
+Scoped Wikipedia parsing: trees are built only for the article body, with lxml
+when it is installed, and intro paragraphs can be streamed without a tree at all.
+Parsing can be offloaded to a process pool that returns compact extracts.
+"""
+
+import codecs
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.element import Tag
+
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+CONTENT_ID = 'mw-content-text'
+
+# Only the article body becomes a tree; nav, footer and sidebars are skipped
+CONTENT_STRAINER = SoupStrainer('div', id=CONTENT_ID)
+
+# Bytes decoded and fed to the streaming parser at a time
+STREAM_CHUNK_SIZE = 16 * 1024
+
+def parse_content(markup: bytes, parser: str = PARSER) -> Optional[Tag]:
+    """
+    Parse just the div#mw-content-text of a Wikipedia page, or None if it has none
+    """
+    soup = BeautifulSoup(markup, parser, parse_only=CONTENT_STRAINER)
+    return soup.find('div', id=CONTENT_ID)
+
+def iter_paragraphs(markup: bytes, encoding: str = 'utf-8') -> Iterator[str]:
+    """
+    Yield the text of each <p> in the article body as the page is parsed.
+    Text matches Tag.get_text(strip=True). Parsing stops as soon as the
+    consumer stops iterating, so finding the intro rarely reads the whole page.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    parser = _ParagraphParser()
+
+    try:
+        for start in range(0, len(markup), STREAM_CHUNK_SIZE):
+            parser.feed(decoder.decode(markup[start:start + STREAM_CHUNK_SIZE]))
+            yield from parser.drain()
+            if parser.left_content:
+                return
+
+        parser.feed(decoder.decode(b'', final=True))
+        parser.close()
+        yield from parser.drain()
+    finally:
+        parser.reset()
+
+def extract_page(markup: bytes, parser: str = PARSER) -> Optional[Dict[str, List[Tuple[str, str]]]]:
+    """
+    Reduce a Wikipedia page to what the scrapers read from it:
+    - links: (text, href) of every titled link in the article body
+    - sections: (heading, text of the paragraph right after it) for h2/h3 headings
+    Returns None if the page has no article body.
+    """
+    content = parse_content(markup, parser)
+    if content is None:
+        return None
+
+    links = []
+    for link in content.find_all('a'):
+        title = link.get_text(strip=True)
+        href = link.get('href', '')
+        if title and href:
+            links.append((title, href))
+
+    sections = []
+    for section in content.find_all(['h2', 'h3']):
+        next_elem = section.find_next_sibling()
+        if next_elem and next_elem.name == 'p':
+            sections.append((section.get_text(), next_elem.get_text(strip=True)))
+
+    return {'links': links, 'sections': sections}
+
+def extract_intro(markup: bytes, min_length: int = 50, skip_prefix: str = 'This article') -> Optional[str]:
+    """
+    Get the first body paragraph longer than min_length characters, streaming the page
+    """
+    for paragraph in iter_paragraphs(markup):
+        if len(paragraph) > min_length and not paragraph.startswith(skip_prefix):
+            return paragraph
+    return None
+
+class ParsePool:
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Run parse functions in `workers` processes, or inline when workers is 0.
+        Defaults to the LUMO_PARSE_WORKERS environment variable (0 if unset).
+        """
+        if workers is None:
+            workers = int(os.getenv('LUMO_PARSE_WORKERS', '0'))
+        self.workers = max(0, workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Scrapers run threads, which fork() doesn't carry over safely
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def run(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Call a top-level parse function with raw page bytes, in a worker process
+        if the pool is enabled, so parsing doesn't hold the GIL of scraper threads
+        """
+        if self.workers == 0:
+            return fn(*args)
+
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        except BrokenProcessPool as e:
+            print(f"⚠️  Parse pool failed ({e}), parsing inline")
+            with self._lock:
+                self._executor = None
+            return fn(*args)
+
+    def close(self) -> None:
+        """Shut down the worker processes"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+_default_pool: Optional[ParsePool] = None
+_default_pool_lock = threading.Lock()
+
+def get_default_pool() -> ParsePool:
+    """
+    Get the process-wide parse pool used by scrapers that weren't given one
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ParsePool()
+        return _default_pool
+
+class _ParagraphParser(HTMLParser):
+    """Collects <p> texts inside div#mw-content-text"""
+
+    # Text inside these never shows up in get_text()
+    SKIPPED_TAGS = ('script', 'style', 'template')
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.content_depth = 0  # open divs inside the content div, 0 when outside
+        self.left_content = False
+        self.skip_depth = 0
+        self.parts: Optional[List[str]] = None  # stripped strings of the open <p>
+        self.pending = ''  # text node being assembled, possibly across chunks
+        self.paragraphs: List[str] = []
+
+    def drain(self) -> List[str]:
+        paragraphs, self.paragraphs = self.paragraphs, []
+        return paragraphs
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+
+        if self.content_depth == 0:
+            if tag == 'div' and not self.left_content and dict(attrs).get('id') == CONTENT_ID:
+                self.content_depth = 1
+            return
+
+        if tag == 'div':
+            self.content_depth += 1
+        elif tag in self.SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag == 'p':
+            self._end_paragraph()
+            self.parts = []
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush_text()
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if self.content_depth == 0:
+            return
+
+        if tag == 'div':
+            self.content_depth -= 1
+            if self.content_depth == 0:
+                self._end_paragraph()
+                self.left_content = True
+        elif tag in self.SKIPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag == 'p':
+            self._end_paragraph()
+
+    def handle_data(self, data):
+        if self.parts is not None and self.skip_depth == 0:
+            self.pending += data
+
+    def close(self):
+        super().close()
+        self._flush_text()
+        self._end_paragraph()
+
+    def _flush_text(self):
+        if self.pending:
+            text = self.pending.strip()
+            if text:
+                self.parts.append(text)
+            self.pending = ''
+
+    def _end_paragraph(self):
+        if self.parts is not None:
+            self.paragraphs.append(''.join(self.parts))
+            self.parts = None
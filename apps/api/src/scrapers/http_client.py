@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+HTTP Client for Lumo Travel Recommendations
+Shared pooled HTTP session so every scraper reuses keep-alive connections
+instead of paying a new TCP+TLS handshake per request. Failed lookups are
+remembered for a while so repeat requests fail fast instead of waiting again.
+"""
+
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import LRUCache
+from .rate_limiter import RateLimiter
+
+# How long each class of failure is remembered before the URL is tried again (seconds)
+NEGATIVE_TTLS = {
+    'not_found': 3600,    # 404, 410: the page doesn't exist
+    'forbidden': 1800,    # 401, 403: e.g. a private subreddit
+    'server_error': 120,  # 5xx: the host is having trouble
+    'timeout': 300,       # the host didn't answer in time
+    'connection': 60      # DNS failure, refused or reset connection
+}
+
+def failure_class(status_code: int) -> Optional[str]:
+    """The negative cache class of an HTTP status, or None if it isn't cached"""
+    if status_code in (404, 410):
+        return 'not_found'
+    if status_code in (401, 403):
+        return 'forbidden'
+    if 500 <= status_code < 600:
+        return 'server_error'
+    return None
+
+class HttpClient:
+    def __init__(
+        self,
+        timeout: float = 15,
+        pool_connections: int = 16,
+        pool_maxsize: int = 16,
+        headers: Optional[Dict[str, str]] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_rate_limit_retries: int = 1,
+        negative_ttls: Optional[Dict[str, float]] = None
+    ):
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_rate_limit_retries = max_rate_limit_retries
+
+        # Failed lookups by full URL; a TTL of 0 turns a failure class off
+        self.negative_ttls = dict(NEGATIVE_TTLS, **(negative_ttls or {}))
+        self.negative_cache = LRUCache(max_entries=1024, max_bytes=1024 * 1024, ttl=max(self.negative_ttls.values()))
+        self.session = requests.Session()
+
+        # urllib3 keeps one connection pool per host: pool_connections hosts,
+        # each holding up to pool_maxsize keep-alive connections
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # requests only decodes gzip/deflate without optional extras, so don't advertise br
+        self.session.headers.update({
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
+        })
+        if headers:
+            self.session.headers.update(headers)
+
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> requests.Response:
+        """
+        Send a GET request on the pooled session with a default timeout,
+        waiting for the host's rate limit and retrying once when throttled.
+        URLs that failed recently fail again straight away: cached error statuses
+        come back as an empty response and cached timeouts or connection errors
+        are raised again.
+        """
+        key = requests.Request('GET', url, params=params).prepare().url
+        failure = self.negative_cache.get(key)
+        if failure is not None:
+            return self._replay_failure(key, failure)
+
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire(url)
+            try:
+                response = self.session.get(
+                    url,
+                    params=params,
+                    headers=headers,
+                    timeout=self.timeout if timeout is None else timeout,
+                    **kwargs
+                )
+            except requests.Timeout as e:
+                self._remember_failure(key, 'timeout', error=str(e))
+                raise
+            except requests.ConnectionError as e:
+                self._remember_failure(key, 'connection', error=str(e))
+                raise
+            blocked_for = self.rate_limiter.update_from_response(url, response)
+
+            if response.status_code != 429 or blocked_for is None or attempt >= self.max_rate_limit_retries:
+                kind = failure_class(response.status_code)
+                if kind:
+                    self._remember_failure(key, kind, status_code=response.status_code)
+                return response
+
+            attempt += 1
+            print(f"⏳ Rate limited by {url}, retrying in {blocked_for:.1f}s")
+
+    def _remember_failure(self, key: str, kind: str, status_code: Optional[int] = None, error: str = '') -> None:
+        ttl = self.negative_ttls.get(kind, 0)
+        if ttl > 0:
+            self.negative_cache.set(key, {'kind': kind, 'status_code': status_code, 'error': error}, ttl=ttl)
+
+    def _replay_failure(self, url: str, failure: Dict[str, Any]) -> requests.Response:
+        """Fail the same way a recently failed URL did, without touching the network"""
+        print(f"⏭️  Skipping {url}, it failed recently ({failure['status_code'] or failure['kind']})")
+
+        if failure['kind'] == 'timeout':
+            raise requests.Timeout(f"Timed out recently: {failure['error']}")
+        if failure['kind'] == 'connection':
+            raise requests.ConnectionError(f"Connection failed recently: {failure['error']}")
+
+        response = requests.Response()
+        response.status_code = failure['status_code']
+        response.reason = 'Failed recently'
+        response.url = url
+        response._content = b''
+        return response
+
+    def close(self) -> None:
+        """Close all pooled connections"""
+        self.session.close()
+
+_default_client: Optional[HttpClient] = None
+_default_client_lock = threading.Lock()
+
+def get_default_client() -> HttpClient:
+    """
+    Get the process-wide client used by scrapers that weren't given one
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Persistent Cache for Lumo Travel Recommendations
+SQLite-backed (WAL mode) cache that survives the Python process and is safe
+to share between concurrent processes
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[2] / ".cache"
+
+def get_cache_dir() -> Path:
+    """
+    Directory for on-disk caches, configurable with LUMO_CACHE_DIR
+    """
+    return Path(os.getenv("LUMO_CACHE_DIR", DEFAULT_CACHE_DIR))
+
+def disk_cache_enabled() -> bool:
+    """Disk caching is on unless LUMO_DISK_CACHE is set to 0/false/off"""
+    return os.getenv("LUMO_DISK_CACHE", "1").lower() not in ("0", "false", "off", "no")
+
+class SQLiteCache:
+    def __init__(self, namespace: str = "default", ttl: float = 3600, path: Optional[str] = None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.path = Path(path) if path else get_cache_dir() / "lumo_cache.db"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        self._local = threading.local()
+        self._execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+
+        # Expired rows are only overwritten when their key comes back, so clear
+        # out this namespace's dead rows whenever it is opened
+        self.purge_expired()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=10)
+            # WAL lets readers in other processes proceed while one process writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        conn = self._connection()
+        with conn:
+            return conn.execute(sql, params).fetchall()
+
+    def get_entry(self, key: str) -> Optional[Tuple[float, Any]]:
+        """
+        Get (stored_at, value) for a key regardless of age
+        """
+        try:
+            rows = self._execute(
+                "SELECT stored_at, value FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            )
+        except sqlite3.Error as e:
+            print(f"Error reading disk cache for {key}: {e}")
+            return None
+
+        if not rows:
+            return None
+
+        stored_at, value = rows[0]
+        try:
+            return stored_at, json.loads(value)
+        except json.JSONDecodeError:
+            return None
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Any:
+        """
+        Get a cached value, or None if missing or older than max_age (defaults to ttl)
+        """
+        entry = self.get_entry(key)
+        if entry is None:
+            return None
+
+        stored_at, value = entry
+        if time.time() - stored_at >= (self.ttl if max_age is None else max_age):
+            return None
+        return value
+
+    def set(self, key: str, value: Any, stored_at: Optional[float] = None) -> None:
+        """Store a JSON-serializable value with its timestamp"""
+        try:
+            self._execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, stored_at, value) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, stored_at or time.time(), json.dumps(value, default=str))
+            )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"Error writing disk cache for {key}: {e}")
+
+    def touch(self, key: str) -> None:
+        """Reset a key's timestamp without rewriting its value"""
+        try:
+            self._execute(
+                "UPDATE cache SET stored_at = ? WHERE namespace = ? AND key = ?",
+                (time.time(), self.namespace, key)
+            )
+        except sqlite3.Error as e:
+            print(f"Error touching disk cache for {key}: {e}")
+
+    def delete(self, key: str) -> None:
+        """Remove a key if present"""
+        try:
+            self._execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+        except sqlite3.Error as e:
+            print(f"Error deleting disk cache for {key}: {e}")
+
+    def purge_expired(self) -> int:
+        """Delete entries older than the ttl, returning how many were removed"""
+        try:
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND stored_at < ?",
+                    (self.namespace, time.time() - self.ttl)
+                )
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"Error purging disk cache: {e}")
+            return 0
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter for Lumo Travel Recommendations
+Per-host token buckets shared across threads and scrapers, which also honor
+Retry-After and rate-limit response headers
+"""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate  # tokens per second
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping until one is available. Returns the time waited.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+
+            time.sleep(wait)
+            waited += wait
+
+    def block_for(self, seconds: float) -> None:
+        """Hold back every request for the given number of seconds"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = min(self.tokens, 0.0)
+
+class RateLimiter:
+    def __init__(self, max_block: float = 60):
+        # Upper bound on how long a server can make us wait
+        self.max_block = max_block
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host: str, rate: float, burst: int = 1) -> None:
+        """
+        Limit a host to `rate` requests per second with bursts of up to `burst`
+        """
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                self._buckets[host] = TokenBucket(rate, burst)
+            else:
+                bucket.rate, bucket.burst = rate, burst
+
+    def _bucket_for(self, url: str) -> Optional[TokenBucket]:
+        return self._buckets.get(urlparse(url).hostname or '')
+
+    def acquire(self, url: str) -> float:
+        """Wait for permission to request url. Hosts without a limit pass straight through."""
+        bucket = self._bucket_for(url)
+        return bucket.acquire() if bucket else 0.0
+
+    def update_from_response(self, url: str, response) -> Optional[float]:
+        """
+        Back off the host according to Retry-After or exhausted rate-limit headers.
+        Returns the number of seconds the host is now blocked for, if any.
+        """
+        bucket = self._bucket_for(url)
+        if bucket is None:
+            return None
+
+        headers = response.headers
+        delay = None
+
+        if response.status_code in (429, 503) and headers.get('Retry-After'):
+            delay = _parse_retry_after(headers['Retry-After'])
+        else:
+            remaining = _parse_float(headers.get('x-ratelimit-remaining'))
+            reset = _parse_float(headers.get('x-ratelimit-reset'))
+            if remaining is not None and reset is not None and remaining < 1:
+                delay = reset
+
+        if delay is None and response.status_code == 429:
+            delay = 1 / bucket.rate
+
+        if delay is None or delay <= 0:
+            return None
+
+        delay = min(delay, self.max_block)
+        bucket.block_for(delay)
+        return delay
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+def _parse_retry_after(value: str) -> Optional[float]:
+    """Retry-After is either delay-seconds or an HTTP date"""
+    seconds = _parse_float(value)
+    if seconds is not None:
+        return seconds
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
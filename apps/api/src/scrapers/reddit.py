@@ -4,15 +4,56 @@ Reddit Scraper for Lumo Travel Recommendations
 Gets authentic local tips and insights from travel communities
 """
 
-import requests
+import contextvars
 import json
 import time
-from typing import Dict, List, Any
-import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Any, Optional
+from .request_memo import memoized_method
+from .http_client import HttpClient, get_default_client
+from .cache import LRUCache
+from .persistent_cache import SQLiteCache
+from .text_classifier import EVENT_CLASSIFIER, INSIGHT_CLASSIFIER, event_dates
 
 class RedditScraper:
-    def __init__(self):
+    def __init__(
+        self,
+        http_client: Optional[HttpClient] = None,
+        requests_per_second: float = 1.0,
+        burst: int = 4,
+        max_workers: int = 4,
+        combined_search: bool = True,
+        route_subreddits: bool = True,
+        listing_ttl: float = 3600,
+        full_refresh_ttl: float = 7 * 24 * 3600,
+        persistent_store: Optional[SQLiteCache] = None
+    ):
+        self.http = http_client or get_default_client()
         self.base_url = "https://www.reddit.com"
+        self.max_workers = max_workers
+        
+        # Query all target subreddits through one r/a+b+c listing instead of one request each
+        self.combined_search = combined_search
+        self.combined_page_size = 100
+        self.combined_max_pages = 2
+        
+        # Post listings keyed by (subreddit, query), shared by tips, insights and
+        # events so one crawl per location serves all three. Listings older than
+        # listing_ttl are refreshed incrementally with only the posts newer than
+        # the newest created_utc already stored; full_refresh_ttl bounds how long
+        # after its last full crawl a listing is crawled from scratch again,
+        # however often it was refreshed in between.
+        self.posts_per_subreddit = 25
+        self.max_stored_posts = 50
+        self.max_seen_ids = 500
+        self.listing_ttl = listing_ttl
+        self.full_refresh_ttl = full_refresh_ttl
+        self.post_store = LRUCache(max_entries=512, max_bytes=16 * 1024 * 1024, ttl=full_refresh_ttl)
+        self.persistent_store = persistent_store
+        
+        # Pace requests with a token bucket shared by every user of the client,
+        # rather than sleeping a fixed second after each subreddit
+        self.http.rate_limiter.configure("www.reddit.com", rate=requests_per_second, burst=burst)
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
@@ -23,61 +64,346 @@ class RedditScraper:
             'ThailandTourism', 'Vietnam', 'MexicoCity', 'EuropeTravel',
             'backpacking', 'solotravel', 'digitalnomad'
         ]
+        self.event_subreddits = ['travel', 'JapanTravel', 'VisitingIceland', 'bali']
+        
+        # Routing index so a location only queries subreddits that can plausibly
+        # answer for it, plus a small general fallback set
+        self.route_subreddits = route_subreddits
+        self.general_subreddits = ['travel', 'solotravel', 'backpacking']
+        self.general_event_subreddits = ['travel']
+        self.city_subreddits = {
+            'bali': ['bali'],
+            'mexico city': ['MexicoCity'],
+            'reykjavik': ['VisitingIceland']
+        }
+        self.country_subreddits = {
+            'japan': ['JapanTravel'],
+            'iceland': ['VisitingIceland'],
+            'indonesia': ['bali', 'indonesia'],
+            'thailand': ['ThailandTourism'],
+            'vietnam': ['Vietnam'],
+            'mexico': ['MexicoCity'],
+            'italy': ['EuropeTravel'],
+            'france': ['EuropeTravel'],
+            'greece': ['EuropeTravel'],
+            'hungary': ['EuropeTravel'],
+            'portugal': ['EuropeTravel'],
+            'switzerland': ['EuropeTravel'],
+            'spain': ['EuropeTravel'],
+            'germany': ['EuropeTravel'],
+            'turkey': ['EuropeTravel']
+        }
     
+    def subreddits_for(self, location: str, general: Optional[List[str]] = None) -> List[str]:
+        """
+        Get the subreddits worth searching for a location: city and country
+        specific ones first, then the general fallback set
+        """
+        parts = [part.strip().lower() for part in location.split(',') if part.strip()]
+        
+        subreddits = []
+        for part in parts:
+            subreddits.extend(self.city_subreddits.get(part, []))
+            subreddits.extend(self.country_subreddits.get(part, []))
+        subreddits.extend(self.general_subreddits if general is None else general)
+        
+        return list(dict.fromkeys(subreddits))
+    
+    @memoized_method
     def search_local_tips(self, location: str) -> List[Dict[str, Any]]:
         """
         Search for local tips and insights about a location
         """
         tips = []
         
-        # Clean location name for search
-        location_clean = location.split(',')[0].strip()  # Get city name only
+        subreddits = self._tip_subreddits(location)
+        posts_by_subreddit = self._get_location_posts(location)
         
-        for subreddit in self.travel_subreddits:
-            try:
-                # Search in specific subreddit
-                search_url = f"{self.base_url}/r/{subreddit}/search.json"
-                params = {
-                    'q': location_clean,
-                    'restrict_sr': 'on',
-                    'sort': 'relevance',
-                    't': 'year'
+        for subreddit in subreddits:
+            for post_data in posts_by_subreddit.get(subreddit, [])[:5]:  # Top 5 posts per subreddit
+                # Extract useful information
+                tip = {
+                    'title': post_data.get('title', ''),
+                    'content': post_data.get('selftext', '')[:500],  # First 500 chars
+                    'url': f"https://reddit.com{post_data.get('permalink', '')}",
+                    'score': post_data.get('score', 0),
+                    'subreddit': subreddit,
+                    'created_utc': post_data.get('created_utc', 0)
                 }
                 
-                response = requests.get(search_url, headers=self.headers, params=params)
-                response.raise_for_status()
-                
-                data = response.json()
-                
-                if 'data' in data and 'children' in data['data']:
-                    for post in data['data']['children'][:5]:  # Get top 5 posts
-                        post_data = post['data']
-                        
-                        # Extract useful information
-                        tip = {
-                            'title': post_data.get('title', ''),
-                            'content': post_data.get('selftext', '')[:500],  # First 500 chars
-                            'url': f"https://reddit.com{post_data.get('permalink', '')}",
-                            'score': post_data.get('score', 0),
-                            'subreddit': subreddit,
-                            'created_utc': post_data.get('created_utc', 0)
-                        }
-                        
-                        # Only include if it has meaningful content
-                        if len(tip['content']) > 50 and tip['score'] > 5:
-                            tips.append(tip)
-                
-                time.sleep(1)  # Be respectful to Reddit's API
-                
-            except Exception as e:
-                print(f"Error searching r/{subreddit} for {location}: {e}")
-                continue
+                # Only include if it has meaningful content
+                if len(tip['content']) > 50 and tip['score'] > 5:
+                    tips.append(tip)
         
         # Sort by relevance (score and recency)
         tips.sort(key=lambda x: (x['score'], x['created_utc']), reverse=True)
         
         return tips[:10]  # Return top 10 tips
     
+    def _tip_subreddits(self, location: str) -> List[str]:
+        return self.subreddits_for(location) if self.route_subreddits else self.travel_subreddits
+    
+    def _event_subreddits(self, location: str) -> List[str]:
+        if self.route_subreddits:
+            return self.subreddits_for(location, general=self.general_event_subreddits)
+        return self.event_subreddits
+    
+    @memoized_method
+    def _get_location_posts(self, location: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get the stored post listings of a location's tip subreddits for the city name
+        """
+        location_clean = location.split(',')[0].strip()  # Get city name only
+        return self._get_listings(self._tip_subreddits(location), location_clean)
+    
+    @memoized_method
+    def _get_event_posts(self, location: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get the stored post listings of a location's event subreddits for an event
+        search, which surfaces far more festival posts than the plain city name
+        """
+        location_clean = location.split(',')[0].strip()
+        return self._get_listings(self._event_subreddits(location), f"{location_clean} festival event")
+    
+    def _get_listings(self, subreddits: List[str], search_query: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get the stored post listings of a search query for every given subreddit.
+        Missing subreddits are crawled in full, stale ones only for newer posts.
+        """
+        query = search_query.lower()
+        subreddits = list(dict.fromkeys(subreddits))
+        
+        now = time.time()
+        listings, stale, missing = {}, {}, []
+        for subreddit in subreddits:
+            listing = self._load_listing(subreddit, query)
+            if listing is None or now - self._crawled_at(listing) >= self.full_refresh_ttl:
+                missing.append(subreddit)
+            elif now - listing['refreshed_at'] >= self.listing_ttl and (not listing['newest_utc'] or not listing['seen_ids']):
+                # Nothing came back from the first crawl, so there is no watermark to
+                # refresh from: crawl by relevance again rather than newest-first
+                missing.append(subreddit)
+            elif now - listing['refreshed_at'] >= self.listing_ttl:
+                stale[subreddit] = listing
+            else:
+                listings[subreddit] = listing
+        
+        # Subreddits whose search failed come back as None and are not saved,
+        # so the next call crawls them again instead of trusting an empty listing
+        if missing:
+            fetched = self._search_posts(missing, search_query, per_subreddit=self.posts_per_subreddit)
+            for subreddit in missing:
+                posts = fetched.get(subreddit)
+                if posts is None:
+                    listings[subreddit] = self._merge_posts(None, [])
+                else:
+                    listings[subreddit] = self._save_listing(subreddit, query, self._merge_posts(None, posts))
+        
+        if stale:
+            newer_than = {subreddit: listing['newest_utc'] for subreddit, listing in stale.items()}
+            fetched = self._search_posts(list(stale), search_query, per_subreddit=self.posts_per_subreddit, newer_than=newer_than)
+            for subreddit, listing in stale.items():
+                posts = fetched.get(subreddit)
+                if posts is None:
+                    listings[subreddit] = listing  # Serve the stale posts until a refresh succeeds
+                else:
+                    listings[subreddit] = self._save_listing(subreddit, query, self._merge_posts(listing, posts))
+        
+        return {subreddit: listings[subreddit]['posts'] for subreddit in subreddits}
+    
+    def _merge_posts(self, listing: Optional[Dict[str, Any]], new_posts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merge newly fetched posts into a stored listing, skipping posts already seen.
+        Without a listing this is a full crawl, whose posts keep Reddit's relevance
+        order; posts from incremental refreshes follow them until the next full crawl.
+        """
+        posts = list(listing['posts']) if listing else []
+        seen_ids = dict.fromkeys(listing['seen_ids']) if listing else {}
+        newest_utc = listing['newest_utc'] if listing else 0
+        now = time.time()
+        
+        for post_data in new_posts:
+            post = self._trim_post(post_data)
+            if post['id'] and post['id'] in seen_ids:
+                continue
+            seen_ids[post['id']] = None
+            posts.append(post)
+            newest_utc = max(newest_utc, post['created_utc'] or 0)
+        
+        return {
+            'posts': posts[:self.max_stored_posts],
+            'seen_ids': list(seen_ids)[-self.max_seen_ids:],
+            'newest_utc': newest_utc,
+            'refreshed_at': now,
+            # Incremental merges keep the time of the full crawl they build on
+            'crawled_at': self._crawled_at(listing) if listing else now
+        }
+    
+    def _crawled_at(self, listing: Dict[str, Any]) -> float:
+        # Listings stored before crawled_at was tracked only have refreshed_at
+        return listing.get('crawled_at', listing['refreshed_at'])
+    
+    def _load_listing(self, subreddit: str, query: str) -> Optional[Dict[str, Any]]:
+        key = (subreddit.lower(), query)
+        listing = self.post_store.get(key)
+        if listing is None and self.persistent_store:
+            listing = self.persistent_store.get(f"{key[0]}|{query}")
+            if listing is not None:
+                self.post_store.set(key, listing, ttl=self._time_to_full_refresh(listing))
+        return listing
+    
+    def _save_listing(self, subreddit: str, query: str, listing: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Store a listing until its next full crawl is due. Both stores expire it by
+        crawl time, so incremental saves don't push the full crawl back.
+        """
+        key = (subreddit.lower(), query)
+        self.post_store.set(key, listing, ttl=self._time_to_full_refresh(listing))
+        if self.persistent_store:
+            self.persistent_store.set(f"{key[0]}|{query}", listing, stored_at=self._crawled_at(listing))
+        return listing
+    
+    def _time_to_full_refresh(self, listing: Dict[str, Any]) -> float:
+        return max(0.0, self._crawled_at(listing) + self.full_refresh_ttl - time.time())
+    
+    def _trim_post(self, post_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep only the post fields the scraper uses"""
+        return {
+            'id': post_data.get('id', ''),
+            'title': post_data.get('title', ''),
+            'selftext': post_data.get('selftext', ''),
+            'permalink': post_data.get('permalink', ''),
+            'score': post_data.get('score', 0),
+            'created_utc': post_data.get('created_utc', 0),
+            'subreddit': post_data.get('subreddit', '')
+        }
+    
+    def _search_posts(
+        self,
+        subreddits: List[str],
+        query: str,
+        per_subreddit: int,
+        newer_than: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+        """
+        Search several subreddits for a query, returning up to per_subreddit posts for each,
+        or None for subreddits whose search failed.
+        With newer_than, only posts created after each subreddit's watermark are returned.
+        """
+        sort = 'new' if newer_than else 'relevance'
+        
+        if self.combined_search:
+            buckets = self._search_combined(
+                subreddits, query, per_subreddit, sort=sort,
+                # Subreddits with nothing stored yet take whatever the pages hold
+                stop_at=min((utc for utc in newer_than.values() if utc), default=None) if newer_than else None
+            )
+        else:
+            results = self._map_subreddits(lambda subreddit: self._search_subreddit(subreddit, query, sort), subreddits)
+            buckets = dict(zip(subreddits, results))
+        
+        if newer_than:
+            buckets = {
+                subreddit: None if posts is None else [
+                    post for post in posts if (post.get('created_utc') or 0) > newer_than.get(subreddit, 0)
+                ]
+                for subreddit, posts in buckets.items()
+            }
+        return {subreddit: None if posts is None else posts[:per_subreddit] for subreddit, posts in buckets.items()}
+    
+    def _search_subreddit(self, subreddit: str, query: str, sort: str = 'relevance') -> Optional[List[Dict[str, Any]]]:
+        """
+        Search one subreddit, returning the post data of the first listing page,
+        or None if the search failed
+        """
+        try:
+            # Search in specific subreddit
+            search_url = f"{self.base_url}/r/{subreddit}/search.json"
+            params = {
+                'q': query,
+                'restrict_sr': 'on',
+                'sort': sort,
+                't': 'year'
+            }
+            
+            response = self.http.get(search_url, headers=self.headers, params=params)
+            response.raise_for_status()
+            
+            data = response.json()
+            return [post['data'] for post in data.get('data', {}).get('children', [])]
+            
+        except Exception as e:
+            print(f"Error searching r/{subreddit} for {query}: {e}")
+            return None
+    
+    def _search_combined(
+        self,
+        subreddits: List[str],
+        query: str,
+        per_subreddit: int,
+        sort: str = 'relevance',
+        stop_at: Optional[float] = None
+    ) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+        """
+        Search all subreddits with one combined r/a+b+c listing, paging until every
+        subreddit has per_subreddit posts, then bucket the posts by subreddit locally.
+        For newest-first listings, paging also stops once posts reach stop_at (created_utc).
+        If any page fails, every subreddit is reported as failed (None), since a
+        partial crawl would leave gaps below the new watermark.
+        """
+        # Listings report display names, so match them case-insensitively
+        names = {subreddit.lower(): subreddit for subreddit in subreddits}
+        buckets: Dict[str, List[Dict[str, Any]]] = {subreddit: [] for subreddit in subreddits}
+        
+        search_url = f"{self.base_url}/r/{'+'.join(subreddits)}/search.json"
+        params = {
+            'q': query,
+            'restrict_sr': 'on',
+            'sort': sort,
+            't': 'year',
+            'limit': self.combined_page_size
+        }
+        
+        for _ in range(self.combined_max_pages):
+            try:
+                response = self.http.get(search_url, headers=self.headers, params=params)
+                response.raise_for_status()
+                listing = response.json().get('data', {})
+            except Exception as e:
+                print(f"Error searching r/{'+'.join(subreddits)} for {query}: {e}")
+                return {subreddit: None for subreddit in subreddits}
+            
+            children = listing.get('children', [])
+            for post in children:
+                post_data = post['data']
+                subreddit = names.get(post_data.get('subreddit', '').lower())
+                if subreddit and len(buckets[subreddit]) < per_subreddit:
+                    buckets[subreddit].append(post_data)
+            
+            if not listing.get('after') or all(len(posts) >= per_subreddit for posts in buckets.values()):
+                break
+            if stop_at is not None and children and (children[-1]['data'].get('created_utc') or 0) <= stop_at:
+                break  # Everything past this page is already stored
+            params['after'] = listing['after']
+        
+        return buckets
+    
+    def _map_subreddits(self, search: Callable[[str], Any], subreddits: List[str]) -> List[Any]:
+        """
+        Run a per-subreddit search for every subreddit concurrently, keeping their order.
+        Request pacing is left to the shared rate limiter.
+        """
+        if self.max_workers <= 1 or len(subreddits) < 2:
+            return [search(subreddit) for subreddit in subreddits]
+        
+        workers = min(self.max_workers, len(subreddits))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reddit") as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, search, subreddit)
+                for subreddit in subreddits
+            ]
+            return [future.result() for future in futures]
+    
     def get_location_insights(self, location: str) -> Dict[str, Any]:
         """
         Get comprehensive local insights for a location
@@ -94,18 +420,8 @@ class RedditScraper:
         }
         
         for tip in tips:
-            content_lower = tip['content'].lower()
-            
-            if any(word in content_lower for word in ['restaurant', 'food', 'eat', 'dining', 'cafe']):
-                categorized_tips['food'].append(tip)
-            elif any(word in content_lower for word in ['hotel', 'hostel', 'accommodation', 'stay', 'lodging']):
-                categorized_tips['accommodation'].append(tip)
-            elif any(word in content_lower for word in ['transport', 'bus', 'train', 'metro', 'subway']):
-                categorized_tips['transportation'].append(tip)
-            elif any(word in content_lower for word in ['attraction', 'visit', 'see', 'temple', 'museum']):
-                categorized_tips['attractions'].append(tip)
-            else:
-                categorized_tips['general'].append(tip)
+            category = INSIGHT_CLASSIFIER.first_category(tip['content'], default='general')
+            categorized_tips[category].append(tip)
         
         return {
             "location": location,
@@ -114,55 +430,33 @@ class RedditScraper:
             "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S")
         }
     
+    @memoized_method
     def get_events_info(self, location: str) -> List[Dict[str, Any]]:
         """
         Get information about local events and festivals
         """
         events = []
         
-        # Search for event-related posts
-        location_clean = location.split(',')[0].strip()
+        # Look for event-related posts in the location's stored event listings
+        posts_by_subreddit = self._get_event_posts(location)
         
-        for subreddit in ['travel', 'JapanTravel', 'VisitingIceland', 'bali']:
-            try:
-                search_url = f"{self.base_url}/r/{subreddit}/search.json"
-                params = {
-                    'q': f"{location_clean} festival event",
-                    'restrict_sr': 'on',
-                    'sort': 'relevance',
-                    't': 'year'
-                }
-                
-                response = requests.get(search_url, headers=self.headers, params=params)
-                response.raise_for_status()
+        for subreddit in self._event_subreddits(location):
+            for post_data in posts_by_subreddit.get(subreddit, [])[:3]:  # Top 3 posts per subreddit
+                # Look for event information in the content
+                content = post_data.get('selftext', '')
+                title = post_data.get('title', '')
                 
-                data = response.json()
+                # Extract potential event names and dates
+                event_info = self._extract_event_info(title, content)
                 
-                if 'data' in data and 'children' in data['data']:
-                    for post in data['data']['children'][:3]:
-                        post_data = post['data']
-                        
-                        # Look for event information in the content
-                        content = post_data.get('selftext', '')
-                        title = post_data.get('title', '')
-                        
-                        # Extract potential event names and dates
-                        event_info = self._extract_event_info(title, content)
-                        
-                        if event_info:
-                            events.append({
-                                'name': event_info['name'],
-                                'dates': event_info['dates'],
-                                'description': event_info['description'],
-                                'source': f"Reddit r/{subreddit}",
-                                'url': f"https://reddit.com{post_data.get('permalink', '')}"
-                            })
-                
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"Error searching events for {location} in r/{subreddit}: {e}")
-                continue
+                if event_info:
+                    events.append({
+                        'name': event_info['name'],
+                        'dates': event_info['dates'],
+                        'description': event_info['description'],
+                        'source': f"Reddit r/{subreddit}",
+                        'url': f"https://reddit.com{post_data.get('permalink', '')}"
+                    })
         
         return events
     
@@ -170,39 +464,23 @@ class RedditScraper:
         """
         Extract event information from Reddit post content
         """
-        # Simple pattern matching for events
-        import re
-        
-        # Look for date patterns
-        date_patterns = [
-            r'(\w+ \d{1,2})',  # Month Day
-            r'(\d{1,2}/\d{1,2})',  # MM/DD
-            r'(\w+ \d{4})',  # Month Year
-        ]
-        
-        dates = []
-        for pattern in date_patterns:
-            matches = re.findall(pattern, content)
-            dates.extend(matches)
-        
-        # Look for festival/event keywords
-        event_keywords = ['festival', 'event', 'celebration', 'ceremony', 'matsuri', 'hanami']
+        # One pass over the content finds event keywords and date spans
+        tags = EVENT_CLASSIFIER.tag(content)
+        dates = tags.spans['date']
         
+        # The first listed keyword present names the event, via the line it first appears on
         event_name = ""
-        for keyword in event_keywords:
-            if keyword in content.lower():
-                # Try to extract the event name
-                lines = content.split('\n')
-                for line in lines:
-                    if keyword in line.lower():
-                        event_name = line.strip()
-                        break
-                break
+        keyword = EVENT_CLASSIFIER.first_keyword(tags, 'event')
+        if keyword:
+            position = tags.keywords[keyword]
+            line_start = content.rfind('\n', 0, position) + 1
+            line_end = content.find('\n', position)
+            event_name = content[line_start:line_end if line_end != -1 else len(content)].strip()
         
         if event_name and dates:
             return {
                 'name': event_name,
-                'dates': ', '.join(dates[:2]),  # First 2 dates found
+                'dates': ', '.join(event_dates(content)[:2]),  # First 2 dates found
                 'description': content[:200] + '...' if len(content) > 200 else content
             }
         
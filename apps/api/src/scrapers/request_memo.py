@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Request Memo for Lumo Travel Recommendations
+Request-scoped memoization shared by all scrapers, so a single pipeline run
+downloads and parses each page once and repeated scraper calls cost nothing
+"""
+
+import contextvars
+import functools
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional
+
+_current_memo: contextvars.ContextVar = contextvars.ContextVar("lumo_request_memo", default=None)
+
+class RequestMemo:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Future] = {}
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the memoized value for key, computing it on first use.
+        Concurrent callers asking for the same key wait for the first one.
+        """
+        with self._lock:
+            future = self._entries.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._entries[key] = future
+
+        if is_owner:
+            try:
+                future.set_result(compute())
+            except BaseException as e:
+                # Failures are memoized too, so a dead page is only hit once per request
+                future.set_exception(e)
+
+        return future.result()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+def current_memo() -> Optional[RequestMemo]:
+    """Get the memo active in the current context, if any"""
+    return _current_memo.get()
+
+@contextmanager
+def memo_scope(memo: Optional[RequestMemo] = None) -> Iterator[RequestMemo]:
+    """
+    Activate a request memo for the duration of the block.
+    Nested scopes reuse the memo that is already active.
+    """
+    active = _current_memo.get()
+    if active is not None and memo is None:
+        yield active
+        return
+
+    token = _current_memo.set(memo or RequestMemo())
+    try:
+        yield _current_memo.get()
+    finally:
+        _current_memo.reset(token)
+
+def memoize(key: Hashable, compute: Callable[[], Any]) -> Any:
+    """Memoize compute() under key in the active request memo, or just call it"""
+    memo = _current_memo.get()
+    if memo is None:
+        return compute()
+    return memo.get_or_compute(key, compute)
+
+def memoized_method(method: Callable) -> Callable:
+    """
+    Decorator memoizing a scraper method's result per instance and arguments
+    within the active request memo
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__qualname__, self, args, tuple(sorted(kwargs.items())))
+        return memoize(key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Routing for Lumo Travel Recommendations
+Orders a day's stops to minimize travel time. Distances come from a vectorized
+haversine matrix, each leg takes its fastest transport mode, and routes are
+solved exactly when short and with nearest neighbour plus 2-opt when long.
+The matrix is built once per location, so many candidate subsets of the same
+attractions can be ordered cheaply.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# Routes with up to this many stops are solved exactly (Held-Karp)
+EXACT_MAX_STOPS = 8
+
+# (name, speed in km/h, fixed minutes spent waiting, parking or boarding)
+Mode = Tuple[str, float, float]
+
+def distance_matrix(points: Sequence[Dict[str, float]]) -> np.ndarray:
+    """Great-circle distances in km between every pair of {'lat', 'lon'} points"""
+    lat = np.radians([point['lat'] for point in points])
+    lon = np.radians([point['lon'] for point in points])
+
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    h = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+def solve_order(times: List[List[float]]) -> List[int]:
+    """
+    Order nodes 1..n-1 to minimize the total time of a path that starts at node 0
+    and doesn't return. Exact up to EXACT_MAX_STOPS stops, heuristic beyond.
+    """
+    stops = len(times) - 1
+    if stops <= 1:
+        return list(range(1, stops + 1))
+    if stops <= EXACT_MAX_STOPS:
+        return _held_karp(times)
+    return _two_opt(times, _nearest_neighbour(times))
+
+def path_minutes(times: List[List[float]], path: Sequence[int]) -> float:
+    """Total time along a path of node indices"""
+    return sum(times[a][b] for a, b in zip(path, path[1:]))
+
+def _held_karp(times: List[List[float]]) -> List[int]:
+    stops = len(times) - 1
+    full = (1 << stops) - 1
+    inf = float('inf')
+
+    # best[mask][j]: cheapest path from node 0 through the stops in mask, ending at stop j
+    best = [[inf] * stops for _ in range(full + 1)]
+    parent = [[-1] * stops for _ in range(full + 1)]
+    for j in range(stops):
+        best[1 << j][j] = times[0][j + 1]
+
+    for mask in range(1, full + 1):
+        row = best[mask]
+        for j in range(stops):
+            cost = row[j]
+            if cost == inf:
+                continue
+            leaving = times[j + 1]
+            for k in range(stops):
+                if mask >> k & 1:
+                    continue
+                extended = mask | 1 << k
+                total = cost + leaving[k + 1]
+                if total < best[extended][k]:
+                    best[extended][k] = total
+                    parent[extended][k] = j
+
+    last = min(range(stops), key=best[full].__getitem__)
+    order, mask = [], full
+    while last != -1:
+        order.append(last + 1)
+        last, mask = parent[mask][last], mask ^ 1 << last
+    return order[::-1]
+
+def _nearest_neighbour(times: List[List[float]]) -> List[int]:
+    unvisited = set(range(1, len(times)))
+    order, current = [], 0
+    while unvisited:
+        current = min(unvisited, key=times[current].__getitem__)
+        unvisited.remove(current)
+        order.append(current)
+    return order
+
+def _two_opt(times: List[List[float]], order: List[int]) -> List[int]:
+    """
+    Reverse segments of the path while that shortens it. Node 0 stays first and
+    the path has a free end. Assumes symmetric times.
+    """
+    path = [0] + order
+    last = len(path) - 1
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, last):
+            for j in range(i + 1, last + 1):
+                before = times[path[i - 1]][path[i]]
+                after = times[path[i - 1]][path[j]]
+                if j < last:
+                    before += times[path[j]][path[j + 1]]
+                    after += times[path[i]][path[j + 1]]
+                if after < before - 1e-9:
+                    path[i:j + 1] = path[i:j + 1][::-1]
+                    improved = True
+    return path[1:]
+
+class TravelTimes:
+    def __init__(
+        self,
+        points: Sequence[Dict[str, float]],
+        modes: Sequence[Mode],
+        start: Optional[Dict[str, float]] = None,
+        detour: float = 1.0
+    ):
+        """
+        Travel times between points, each leg by its fastest mode. Node 0 is the start,
+        or a free start with zero-cost legs when none is given. Street distance is
+        estimated as great-circle distance times detour.
+        """
+        self.has_start = start is not None
+        nodes = [start] + list(points) if self.has_start else list(points)
+
+        km = distance_matrix(nodes) * detour if nodes else np.zeros((0, 0))
+        if not self.has_start:
+            km = np.pad(km, ((1, 0), (1, 0)))
+
+        # Minutes by every mode at once, then the fastest mode per leg
+        speeds = np.array([speed for _, speed, _ in modes], dtype=float)[:, None, None]
+        waits = np.array([wait for _, _, wait in modes], dtype=float)[:, None, None]
+        minutes = km[None, :, :] / speeds * 60 + waits
+        fastest = minutes.argmin(axis=0)
+        minutes = minutes.min(axis=0)
+        np.fill_diagonal(minutes, 0.0)
+        if not self.has_start:
+            minutes[0, :] = minutes[:, 0] = 0.0
+
+        self.mode_names = [name for name, _, _ in modes]
+        self.km = km.tolist()
+        self.minutes = minutes.tolist()
+        self.fastest = fastest.tolist()
+
+    def best_order(self, stops: Optional[Sequence[int]] = None) -> Tuple[List[int], float]:
+        """
+        Fastest visiting order for a subset of point indices (all points by default),
+        and its total travel minutes including the leg from the start
+        """
+        if stops is None:
+            stops = range(len(self.minutes) - 1)
+        stops = list(stops)
+
+        nodes = [0] + [stop + 1 for stop in stops]
+        times = [[self.minutes[a][b] for b in nodes] for a in nodes]
+        order = [stops[k - 1] for k in solve_order(times)]
+        return order, path_minutes(self.minutes, [0] + [stop + 1 for stop in order])
+
+    def leg(self, from_stop: Optional[int], to_stop: int) -> Optional[Tuple[str, float, float]]:
+        """
+        (mode, km, minutes) between two point indices, with from_stop None meaning the
+        start. None for the first leg when there is no start.
+        """
+        a = 0 if from_stop is None else from_stop + 1
+        b = to_stop + 1
+        if a == 0 and not self.has_start:
+            return None
+        return self.mode_names[self.fastest[a][b]], self.km[a][b], self.minutes[a][b]
@@ -4,23 +4,99 @@ Scraper Manager for Lumo Travel Recommendations
 Combines data from multiple scrapers for comprehensive location information
 """
 
+import contextvars
 import time
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from .wikipedia import WikipediaScraper
 from .reddit import RedditScraper
 from .weather import WeatherScraper
 from .transportation import TransportationScraper
+from .request_memo import memo_scope
+from .cache import LRUCache
+from .persistent_cache import SQLiteCache, disk_cache_enabled
+from .http_client import HttpClient
+from .geocoding import Geocoder
+from .text_classifier import STYLE_CLASSIFIER, TIP_CLASSIFIER
 import sys
 import json
 
 class ScraperManager:
-    def __init__(self):
-        self.wikipedia_scraper = WikipediaScraper()
-        self.reddit_scraper = RedditScraper()
-        self.weather_scraper = WeatherScraper()
-        self.transportation_scraper = TransportationScraper()
-        self.cache = {}
+    def __init__(
+        self,
+        concurrent: bool = True,
+        max_workers: int = 7,
+        cache: Optional[LRUCache] = None,
+        persistent_cache: Optional[SQLiteCache] = None,
+        http_client: Optional[HttpClient] = None
+    ):
+        # One pooled session shared by every scraper so connections are reused
+        self.http_client = http_client or HttpClient()
+        self.wikipedia_scraper = WikipediaScraper(http_client=self.http_client)
+        self.reddit_scraper = RedditScraper(http_client=self.http_client)
+        # One coordinate store shared by weather lookups and travel distances
+        self.geocoder = Geocoder(http_client=self.http_client)
+        self.weather_scraper = WeatherScraper(http_client=self.http_client, geocoder=self.geocoder)
+        self.transportation_scraper = TransportationScraper(geocoder=self.geocoder)
         self.cache_duration = 3600  # 1 hour
+        
+        # Bounded so a long-running worker serving many destinations can't grow without limit
+        self.cache = cache if cache is not None else LRUCache(
+            max_entries=128,
+            max_bytes=32 * 1024 * 1024,
+            ttl=self.cache_duration
+        )
+        
+        # The Node API may run each request in a fresh process, so also keep
+        # scraped payloads on disk where the next process can find them
+        if persistent_cache is None and disk_cache_enabled():
+            try:
+                persistent_cache = SQLiteCache(namespace="location", ttl=self.cache_duration)
+            except Exception as e:
+                print(f"⚠️  Disk cache unavailable: {e}")
+        self.persistent_cache = persistent_cache
+        
+        # Keep Reddit listings on disk too, so incremental refreshes survive restarts
+        if self.persistent_cache and self.reddit_scraper.persistent_store is None:
+            self.reddit_scraper.persistent_store = SQLiteCache(
+                namespace="reddit_posts",
+                ttl=self.reddit_scraper.full_refresh_ttl,
+                path=self.persistent_cache.path
+            )
+        
+        # Keep parsed Wikipedia pages on disk with their validators, so expired
+        # pages are revalidated with conditional GETs rather than downloaded again
+        if self.persistent_cache and self.wikipedia_scraper.page_store is None:
+            self.wikipedia_scraper.page_store = SQLiteCache(
+                namespace="wikipedia_pages",
+                ttl=self.wikipedia_scraper.page_retention,
+                path=self.persistent_cache.path
+            )
+        
+        # Coordinates never change, so geocoding results are kept on disk for a year
+        if self.persistent_cache and self.geocoder.store is None:
+            self.geocoder.store = SQLiteCache(
+                namespace="geocode",
+                ttl=365 * 24 * 3600,
+                path=self.persistent_cache.path
+            )
+        
+        # Run independent sources in parallel so a cold lookup costs the
+        # slowest source rather than the sum of all of them
+        self.concurrent = concurrent
+        self.max_workers = max_workers
+    
+    def purge_disk_cache(self) -> int:
+        """
+        Delete expired rows from every on-disk store, returning how many were removed
+        """
+        stores = [
+            self.persistent_cache,
+            self.reddit_scraper.persistent_store,
+            self.wikipedia_scraper.page_store,
+            self.geocoder.store
+        ]
+        return sum(store.purge_expired() for store in stores if store)
     
     def get_comprehensive_location_data(self, location: str) -> Dict[str, Any]:
         """
@@ -28,40 +104,84 @@ class ScraperManager:
         """
         # Check cache first
         cache_key = f"location_{location}"
-        if cache_key in self.cache:
-            cached_time, cached_data = self.cache[cache_key]
-            if time.time() - cached_time < self.cache_duration:
-                print(f"📋 Using cached data for {location}")
-                return cached_data
+        cached_data = self.cache.get(cache_key)
+        if cached_data is not None:
+            print(f"📋 Using cached data for {location}")
+            return self._with_fresh_weather(location, cached_data)
+        
+        if self.persistent_cache:
+            entry = self.persistent_cache.get_entry(cache_key)
+            if entry:
+                stored_at, cached_data = entry
+                remaining = self.cache_duration - (time.time() - stored_at)
+                if remaining > 0:
+                    print(f"💾 Using disk-cached data for {location}")
+                    self.cache.set(cache_key, cached_data, ttl=remaining)
+                    return self._with_fresh_weather(location, cached_data)
         
         print(f"🔍 Scraping comprehensive data for {location}...")
         
-        # Get data from all scrapers
-        attractions_data = self._get_attractions(location)
-        local_insights = self._get_local_insights(location)
-        events = self._get_events(location)
-        weather = self._get_weather(location)
-        transportation = self._get_transportation(location)
-        restaurants = self._get_restaurants(location)
-        best_time = self._get_best_time(location)
+        # Get data from all scrapers, sharing fetched pages and results across them
+        with memo_scope():
+            results = self._run_sources(location, {
+                "attractions": self._get_attractions,
+                "local_insights": self._get_local_insights,
+                "events": self._get_events,
+                "weather": self._get_weather,
+                "transportation": self._get_transportation,
+                "restaurants": self._get_restaurants,
+                "best_time_to_visit": self._get_best_time
+            })
         
         data = {
             "location": location,
-            "attractions": attractions_data,
-            "local_insights": local_insights,
-            "events": events,
-            "weather": weather,
-            "transportation": transportation,
-            "restaurants": restaurants,
-            "best_time_to_visit": best_time,
+            **results,
             "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S")
         }
         
         # Cache the data
-        self.cache[cache_key] = (time.time(), data)
+        self.cache.set(cache_key, data)
+        if self.persistent_cache:
+            self.persistent_cache.set(cache_key, data)
         
         return data
     
+    def _with_fresh_weather(self, location: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Swap the weather in cached location data for the weather scraper's own,
+        which lives on a shorter TTL, so stale weather never forces a full rescrape
+        """
+        with memo_scope():
+            return {**data, "weather": self._get_weather(location), "best_time_to_visit": self._get_best_time(location)}
+    
+    def prefetch_weather(self, locations: List[str]) -> None:
+        """
+        Warm the weather cache for several locations with one concurrent batch
+        """
+        try:
+            self.weather_scraper.get_weather_batch(locations)
+        except Exception as e:
+            print(f"Error prefetching weather: {e}")
+    
+    def _run_sources(self, location: str, sources: Dict[str, Callable[[str], Any]]) -> Dict[str, Any]:
+        """
+        Run each source getter for a location, in parallel when concurrent mode is on.
+        Results keep the order of the sources mapping.
+        """
+        if not self.concurrent or len(sources) < 2:
+            return {key: getter(location) for key, getter in sources.items()}
+        
+        workers = max(1, min(self.max_workers, len(sources)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scraper") as executor:
+            # Copy the context so worker threads see the active request memo
+            futures = {
+                key: executor.submit(contextvars.copy_context().run, getter, location)
+                for key, getter in sources.items()
+            }
+            
+            # Every getter handles its own errors, so result() only re-raises bugs
+            return {key: future.result() for key, future in futures.items()}
+    
     def _get_attractions(self, location: str) -> List[Dict[str, Any]]:
         """Get attractions from Wikipedia"""
         try:
@@ -102,13 +222,13 @@ class ScraperManager:
     def _get_weather(self, location: str) -> Dict[str, Any]:
         """Get weather information"""
         try:
-            current_weather = self.weather_scraper.get_current_weather(location)
-            forecast = self.weather_scraper.get_weather_forecast(location)
+            # Shares one upstream request with _get_best_time through the request memo
+            weather = self.weather_scraper.get_weather_bundle(location)
             
             return {
-                "current": current_weather.get('current', {}),
-                "forecast": forecast.get('forecast', []),
-                "source": current_weather.get('source', 'Unknown')
+                "current": weather.get('current', {}),
+                "forecast": weather.get('forecast', [])[:5],
+                "source": weather.get('source', 'Unknown')
             }
         except Exception as e:
             print(f"Error getting weather for {location}: {e}")
@@ -136,7 +256,7 @@ class ScraperManager:
     def _get_best_time(self, location: str) -> Dict[str, Any]:
         """Get best time to visit"""
         try:
-            return self.weather_scraper.get_best_time_to_visit(location)
+            return self.weather_scraper.get_weather_bundle(location)['best_time_to_visit']
         except Exception as e:
             print(f"Error getting best time for {location}: {e}")
             return {}
@@ -180,13 +300,10 @@ class ScraperManager:
         for attraction in attractions:
             name = attraction.get('name', '').lower()
             description = attraction.get('description', '').lower()
+            styles = STYLE_CLASSIFIER.classify(name + "\n" + description)
             
             # Check if attraction matches travel style
-            if travel_style == 'cultural' and any(word in name or word in description for word in ['temple', 'shrine', 'museum', 'castle', 'palace']):
-                filtered.append(attraction)
-            elif travel_style == 'adventure' and any(word in name or word in description for word in ['mountain', 'volcano', 'hike', 'nature', 'park']):
-                filtered.append(attraction)
-            elif travel_style == 'relaxed' and any(word in name or word in description for word in ['garden', 'spa', 'beach', 'forest']):
+            if travel_style in styles:
                 filtered.append(attraction)
             else:
                 # Include if it matches any preferred activities
@@ -207,18 +324,16 @@ class ScraperManager:
         
         filtered = []
         for insight in insights:
-            tip = insight.get('tip', '').lower()
+            topics = TIP_CLASSIFIER.classify(insight.get('tip', ''))
             
             # Check if insight matches preferences
-            if travel_style == 'cultural' and any(word in tip for word in ['traditional', 'cultural', 'historic']):
+            if travel_style in ('cultural', 'adventure') and travel_style in topics:
                 filtered.append(insight)
-            elif travel_style == 'adventure' and any(word in tip for word in ['adventure', 'outdoor', 'hiking']):
-                filtered.append(insight)
-            elif food_preference and any(word in tip for word in ['food', 'restaurant', 'cuisine', 'dining']):
+            elif food_preference and 'food' in topics:
                 filtered.append(insight)
             else:
                 # Include general tips
-                if any(word in tip for word in ['local', 'hidden', 'secret', 'authentic']):
+                if 'general' in topics:
                     filtered.append(insight)
         
         return filtered if filtered else insights
@@ -227,7 +342,8 @@ class ScraperManager:
         """Get data for itinerary generation with transportation and timing"""
         location_data = self.get_comprehensive_location_data(location)
         attractions = location_data['attractions'][:5]
-        optimal_route = self.transportation_scraper.get_optimal_route(location, attractions)
+        # Route only the stops a day's schedule has room for: 2 morning, 2 afternoon
+        optimal_route = self.transportation_scraper.get_optimal_route(location, attractions[:4])
         
         return {
             "location": location,
@@ -246,13 +362,18 @@ class ScraperManager:
         """Calculate a realistic itinerary with proper timing and logistics"""
         itinerary_data = self.get_itinerary_data(location, user_preferences)
         
+        # Stops that don't fit the morning move to the afternoon
+        stops = self._route_stops(itinerary_data)
+        morning_schedule, stops = self._create_morning_schedule(itinerary_data, stops)
+        afternoon_schedule = self._create_afternoon_schedule(itinerary_data, stops)
+        
         structured_itinerary = {
             "location": location,
             "user_preferences": user_preferences,
             "weather_conditions": itinerary_data['weather'],
             "transportation_info": itinerary_data['transportation'],
-            "morning_schedule": self._create_morning_schedule(itinerary_data),
-            "afternoon_schedule": self._create_afternoon_schedule(itinerary_data),
+            "morning_schedule": morning_schedule,
+            "afternoon_schedule": afternoon_schedule,
             "evening_schedule": self._create_evening_schedule(itinerary_data),
             "total_estimated_cost": self._calculate_total_cost(itinerary_data),
             "travel_tips": self._generate_travel_tips(itinerary_data)
@@ -260,80 +381,101 @@ class ScraperManager:
         
         return structured_itinerary
     
-    def _create_morning_schedule(self, itinerary_data: Dict) -> List[Dict]:
-        """Create morning schedule (6 AM - 12 PM)"""
-        attractions = itinerary_data['attractions'][:2]  # Use first 2 attractions
-        schedule = []
-        
-        current_time = 6  # 6 AM start
-        
-        for i, attraction in enumerate(attractions):
-            # Add travel time if not first attraction
-            if i > 0:
-                travel_time = 30  # Assume 30 minutes travel
-                schedule.append({
-                    "time": f"{current_time:02d}:00-{current_time + travel_time//60:02d}:{travel_time%60:02d}",
-                    "activity": f"Travel to {attraction['name']}",
-                    "duration": f"{travel_time} minutes",
-                    "type": "travel"
-                })
-                current_time += travel_time // 60
-            
-            # Add attraction visit
-            visit_duration = 90  # 1.5 hours per attraction
-            schedule.append({
-                "time": f"{current_time:02d}:00-{current_time + visit_duration//60:02d}:{visit_duration%60:02d}",
-                "activity": f"Visit {attraction['name']}",
-                "description": attraction.get('description', ''),
-                "duration": f"{visit_duration} minutes",
-                "type": "attraction"
-            })
-            current_time += visit_duration // 60
-        
-        return schedule
+    def _create_morning_schedule(self, itinerary_data: Dict, stops: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Create morning schedule (6 AM - 12 PM) from the first 2 route stops,
+        returning it with the stops left for the afternoon
+        """
+        schedule, visited = self._schedule_stops(stops[:2], 6 * 60, 12 * 60)  # 6 AM start
+        return schedule, stops[visited:]
     
-    def _create_afternoon_schedule(self, itinerary_data: Dict) -> List[Dict]:
-        """Create afternoon schedule (12 PM - 6 PM)"""
-        attractions = itinerary_data['attractions'][2:4]  # Use next 2 attractions
+    def _create_afternoon_schedule(self, itinerary_data: Dict, stops: List[Dict]) -> List[Dict]:
+        """Create afternoon schedule (12 PM - 6 PM) from the next 2 route stops"""
         restaurants = itinerary_data['restaurants'].get('local', [])
         schedule = []
         
-        current_time = 12  # 12 PM start
+        current_time = 12 * 60  # 12 PM start
         
         # Lunch
         if restaurants:
             restaurant = restaurants[0] if restaurants else {"name": "Local restaurant"}
             schedule.append({
-                "time": f"{current_time:02d}:00-{current_time + 1:02d}:00",
+                "time": self._time_range(current_time, 60),
                 "activity": f"Lunch at {restaurant.get('name', 'Local restaurant')}",
                 "duration": "1 hour",
                 "type": "dining"
             })
-            current_time += 1
+            current_time += 60
         
-        # Afternoon attractions
-        for i, attraction in enumerate(attractions):
-            if i > 0:
-                travel_time = 30
-                schedule.append({
-                    "time": f"{current_time:02d}:00-{current_time + travel_time//60:02d}:{travel_time%60:02d}",
+        # Afternoon attractions, travelling on from the last morning stop
+        afternoon, _ = self._schedule_stops(stops[:2], current_time, 18 * 60, travel_to_first=True)
+        schedule.extend(afternoon)
+        return schedule
+    
+    def _route_stops(self, itinerary_data: Dict) -> List[Dict]:
+        """
+        The day's stops in route order, each with the travel leg leading to it.
+        Falls back to the attractions in their given order without travel legs.
+        """
+        route = itinerary_data.get('optimal_route')
+        if route:
+            return route
+        return [{"activity": attraction, "travel_to_activity": {}} for attraction in itinerary_data['attractions']]
+    
+    def _schedule_stops(
+        self,
+        stops: List[Dict],
+        current_time: int,
+        end_time: int,
+        travel_to_first: bool = False
+    ) -> Tuple[List[Dict], int]:
+        """
+        Schedule visits to consecutive route stops between current_time and end_time
+        (minutes after midnight), with the route's travel time before each stop.
+        Stops from the first one that doesn't fit onwards are left out; returns the
+        schedule and how many stops it visits.
+        """
+        schedule = []
+        visit_duration = 90  # 1.5 hours per attraction
+        
+        for i, stop in enumerate(stops):
+            attraction = stop['activity']
+            travels = i > 0 or travel_to_first
+            
+            leg = stop.get('travel_to_activity') or {}
+            travel_time = leg.get('travel_time_minutes', 30) if travels else 0  # Assume 30 minutes without a route
+            if current_time + travel_time + visit_duration > end_time:
+                return schedule, i
+            
+            # Add travel time unless the block starts at this attraction
+            if travels:
+                travel = {
+                    "time": self._time_range(current_time, travel_time),
                     "activity": f"Travel to {attraction['name']}",
                     "duration": f"{travel_time} minutes",
                     "type": "travel"
-                })
-                current_time += travel_time // 60
+                }
+                if leg.get('method'):
+                    travel["method"] = leg['method']
+                schedule.append(travel)
+                current_time += travel_time
             
-            visit_duration = 90
+            # Add attraction visit
             schedule.append({
-                "time": f"{current_time:02d}:00-{current_time + visit_duration//60:02d}:{visit_duration%60:02d}",
+                "time": self._time_range(current_time, visit_duration),
                 "activity": f"Visit {attraction['name']}",
                 "description": attraction.get('description', ''),
                 "duration": f"{visit_duration} minutes",
                 "type": "attraction"
             })
-            current_time += visit_duration // 60
+            current_time += visit_duration
         
-        return schedule
+        return schedule, len(stops)
+    
+    def _time_range(self, start: int, duration: int) -> str:
+        """Format a span given in minutes after midnight as HH:MM-HH:MM"""
+        end = start + duration
+        return f"{start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d}"
     
     def _create_evening_schedule(self, itinerary_data: Dict) -> List[Dict]:
         """Create evening schedule (6 PM - 10 PM)"""
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Text Classifier for Lumo Travel Recommendations
+Precompiled single-pass keyword tagging shared by the scrapers' keyword filters
+"""
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Pattern, Tuple
+
+# Joins batched texts; must not occur in any keyword or span
+SEPARATOR = '\x00'
+
+@dataclass
+class TextTags:
+    # Matched categories, in the classifier's priority order
+    categories: List[str] = field(default_factory=list)
+    # Matched keywords mapped to the offset of their first occurrence
+    keywords: Dict[str, int] = field(default_factory=dict)
+    # Matched text spans by span name, in order of appearance
+    spans: Dict[str, List[str]] = field(default_factory=dict)
+
+class TextClassifier:
+    def __init__(self, categories: Dict[str, Iterable[str]], spans: Optional[Dict[str, str]] = None):
+        """
+        categories maps a category name to its keywords, in priority order.
+        Keywords match anywhere in the text, exactly like `keyword in text.lower()`.
+        spans maps a span name to a regex collected from the lowercased text;
+        matches are reported with their original casing.
+        """
+        self.categories = {name: tuple(keyword.lower() for keyword in keywords) for name, keywords in categories.items()}
+        self.span_names = list(spans or {})
+
+        self.keyword_categories: Dict[str, List[str]] = {}
+        for name, keywords in self.categories.items():
+            for keyword in keywords:
+                self.keyword_categories.setdefault(keyword, [])
+                if name not in self.keyword_categories[keyword]:
+                    self.keyword_categories[keyword].append(name)
+
+        # The regex consumes the longest keyword at each position, so precompute
+        # which keywords each one contains ("restaurants" implies "restaurant")...
+        keywords = sorted(self.keyword_categories, key=len, reverse=True)
+        self._implied = {
+            keyword: [other for other in keywords if other in keyword]
+            for keyword in keywords
+        }
+        # ...and which ones another keyword can start inside of and run past,
+        # since only those need the scan to resume mid-match
+        self._overlapping = {
+            keyword for keyword in keywords
+            if any(
+                other.startswith(keyword[i:]) and len(other) > len(keyword) - i
+                for other in keywords for i in range(1, len(keyword))
+            )
+        }
+
+        # Lowest category index each keyword (with the keywords it implies) reaches
+        rank = {name: i for i, name in enumerate(self.categories)}
+        self._keyword_rank = {
+            keyword: min(rank[name] for implied in self._implied[keyword] for name in self.keyword_categories[implied])
+            for keyword in keywords
+        }
+
+        # Spans come first so e.g. "festival 2024" is taken as a date, and are
+        # then searched for the keywords inside them
+        keyword_pattern = '|'.join(re.escape(keyword) for keyword in keywords) or '(?!)'
+        alternatives = [f"(?P<span{i}>{pattern})" for i, pattern in enumerate((spans or {}).values())]
+        alternatives.append(f"(?P<kw>{keyword_pattern})")
+        self._pattern: Pattern = re.compile('|'.join(alternatives))
+        self._keyword_pattern: Pattern = re.compile(keyword_pattern)
+
+    def _scan(self, lowered: str) -> Iterator[Tuple[int, int, Optional[str]]]:
+        """
+        Yield (start, end, span name) for every span, and (start, end, None)
+        for every keyword, in one left-to-right pass over lowercased text
+        """
+        pos = 0
+        while True:
+            match = self._pattern.search(lowered, pos)
+            if match is None:
+                return
+
+            start, end = match.span()
+            if match.lastgroup == 'kw':
+                yield start, end, None
+                pos = start + 1 if lowered[start:end] in self._overlapping else end
+            else:
+                yield start, end, self.span_names[int(match.lastgroup[4:])]
+                yield from self._scan_keywords(lowered, start, end)
+                pos = end
+
+    def _scan_keywords(self, lowered: str, pos: int, endpos: int) -> Iterator[Tuple[int, int, Optional[str]]]:
+        while True:
+            match = self._keyword_pattern.search(lowered, pos, endpos)
+            if match is None:
+                return
+
+            start, end = match.span()
+            yield start, end, None
+            pos = start + 1 if match.group() in self._overlapping else end
+
+    def _join(self, texts: List[str]) -> Tuple[List[str], str, List[int]]:
+        """Lowercase and join a batch, returning the offset where each text starts"""
+        lowered = [text.lower() for text in texts]
+        starts = []
+        offset = 0
+        for text in lowered:
+            starts.append(offset)
+            offset += len(text) + 1
+        return lowered, SEPARATOR.join(lowered), starts
+
+    def tag(self, text: str) -> TextTags:
+        """
+        Tag a text with its categories, keywords and spans in a single pass
+        """
+        return self.tag_many([text])[0]
+
+    def tag_many(self, texts: List[str]) -> List[TextTags]:
+        """
+        Tag a batch of texts with one scan over their concatenation
+        """
+        lowered, joined, starts = self._join(texts)
+        tags = [TextTags(spans={name: [] for name in self.span_names}) for _ in texts]
+
+        for start, end, span_name in self._scan(joined):
+            index = bisect_right(starts, start) - 1
+            offset = start - starts[index]
+            found = joined[start:end]
+
+            if span_name is None:
+                self._add_keyword(tags[index].keywords, found, offset)
+            else:
+                # Report the original casing unless lowercasing changed the length
+                original = texts[index]
+                if len(original) == len(lowered[index]):
+                    found = original[offset:offset + end - start]
+                tags[index].spans[span_name].append(found)
+
+        for text_tags in tags:
+            matched = set()
+            for keyword in text_tags.keywords:
+                matched.update(self.keyword_categories[keyword])
+            text_tags.categories = [name for name in self.categories if name in matched]
+
+        return tags
+
+    def _add_keyword(self, keywords: Dict[str, int], keyword: str, position: int) -> None:
+        for implied in self._implied[keyword]:
+            if implied not in keywords:
+                keywords[implied] = position + keyword.find(implied)
+
+    def classify(self, text: str) -> List[str]:
+        """Get every category whose keywords appear in the text, in priority order"""
+        return self.tag(text).categories
+
+    def first_category(self, text: str, default: Optional[str] = None) -> Optional[str]:
+        """Get the highest-priority matching category"""
+        return self.first_categories([text], default)[0]
+
+    def first_categories(self, texts: List[str], default: Optional[str] = None) -> List[Optional[str]]:
+        """
+        Get the highest-priority matching category of every text in a batch.
+        Only tracks one rank per text, so it stays cheap for thousands of short texts.
+        """
+        _, joined, starts = self._join(texts)
+        names = list(self.categories)
+        best = [len(names)] * len(texts)
+
+        for start, end, span_name in self._scan(joined):
+            if span_name is None:
+                index = bisect_right(starts, start) - 1
+                rank = self._keyword_rank[joined[start:end]]
+                if rank < best[index]:
+                    best[index] = rank
+
+        return [names[rank] if rank < len(names) else default for rank in best]
+
+    def first_keyword(self, tags: TextTags, category: str) -> Optional[str]:
+        """Get the category's highest-priority keyword present in the tags"""
+        for keyword in self.categories.get(category, ()):
+            if keyword in tags.keywords:
+                return keyword
+        return None
+
+# Reddit tip categories, checked in this order
+INSIGHT_CLASSIFIER = TextClassifier({
+    'food': ['restaurant', 'food', 'eat', 'dining', 'cafe'],
+    'accommodation': ['hotel', 'hostel', 'accommodation', 'stay', 'lodging'],
+    'transportation': ['transport', 'bus', 'train', 'metro', 'subway'],
+    'attractions': ['attraction', 'visit', 'see', 'temple', 'museum']
+})
+
+# Event keywords plus date-like spans: MM/DD, Month Year, Month Day
+EVENT_CLASSIFIER = TextClassifier(
+    {'event': ['festival', 'event', 'celebration', 'ceremony', 'matsuri', 'hanami']},
+    spans={'date': r'(?:\d{1,2}/\d{1,2}|\w+ \d{4}|\w+ \d{1,2})'}
+)
+
+# The same date forms, listed the way event dates are reported: every Month Day,
+# then every MM/DD, then every Month Year
+EVENT_DATE_PATTERNS = [re.compile(r'\w+ \d{1,2}'), re.compile(r'\d{1,2}/\d{1,2}'), re.compile(r'\w+ \d{4}')]
+
+def event_dates(text: str) -> List[str]:
+    """
+    List the dates in a text in reporting order. Only worth running once the
+    classifier has found a date span, since it takes a pass per form.
+    """
+    return [date for pattern in EVENT_DATE_PATTERNS for date in pattern.findall(text)]
+
+# Attraction keywords per travel style, used to filter by user preferences
+STYLE_CLASSIFIER = TextClassifier({
+    'cultural': ['temple', 'shrine', 'museum', 'castle', 'palace'],
+    'adventure': ['mountain', 'volcano', 'hike', 'nature', 'park'],
+    'relaxed': ['garden', 'spa', 'beach', 'forest']
+})
+
+# Local insight topics, used to filter by user preferences
+TIP_CLASSIFIER = TextClassifier({
+    'cultural': ['traditional', 'cultural', 'historic'],
+    'adventure': ['adventure', 'outdoor', 'hiking'],
+    'food': ['food', 'restaurant', 'cuisine', 'dining'],
+    'general': ['local', 'hidden', 'secret', 'authentic']
+})
+
+# Wikipedia link titles: exclusions win over attraction kinds, checked in this order
+LINK_CLASSIFIER = TextClassifier({
+    'exclude': [
+        'airport', 'station', 'hotel', 'restaurant', 'school', 'university',
+        'hospital', 'bank', 'office', 'company', 'corporation', 'district',
+        'prefecture', 'region', 'province', 'country', 'island', 'mountain',
+        'river', 'lake', 'sea', 'ocean', 'bay', 'gulf', 'strait'
+    ],
+    'religious': [
+        'temple', 'shrine', 'cathedral', 'church', 'mosque', 'sanctuary',
+        'pagoda', 'monastery', 'abbey', 'basilica'
+    ],
+    'historic': ['castle', 'palace', 'fortress', 'ruins', 'monument', 'landmark', 'tower'],
+    'museum': ['museum'],
+    'nature': ['park', 'garden'],
+    'urban': ['bridge', 'square', 'market']
+})
@@ -6,10 +6,45 @@ Provides realistic travel information and logistics for different cities
 
 import json
 import time
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from .geocoding import Geocoder, get_default_geocoder, haversine_km
+
+try:
+    from .routing import TravelTimes
+except ImportError:  # numpy not installed: routes keep their given order
+    TravelTimes = None
+
+# Simplified travel time calculations
+TRAVEL_SPEEDS = {
+    "Kyoto, Japan": {
+        "walking": {"speed": "4 km/h", "description": "Pleasant walking city"},
+        "bus": {"speed": "15 km/h", "description": "Frequent stops, traffic"},
+        "subway": {"speed": "30 km/h", "description": "Fast between stations"},
+        "bicycle": {"speed": "12 km/h", "description": "Popular and efficient"}
+    },
+    "Reykjavik, Iceland": {
+        "walking": {"speed": "4 km/h", "description": "Compact city center"},
+        "bus": {"speed": "20 km/h", "description": "Reliable but limited routes"},
+        "car": {"speed": "40 km/h", "description": "Fastest option"}
+    },
+    "Bali, Indonesia": {
+        "walking": {"speed": "3 km/h", "description": "Hot and humid"},
+        "scooter": {"speed": "25 km/h", "description": "Most popular option"},
+        "taxi": {"speed": "20 km/h", "description": "Traffic dependent"},
+        "bus": {"speed": "15 km/h", "description": "Limited routes, traffic"}
+    }
+}
+
+# Minutes spent waiting, boarding or parking on top of time in motion
+WAIT_MINUTES = {"walking": 0, "bicycle": 2, "scooter": 2, "car": 5, "taxi": 5, "subway": 6, "bus": 8}
+
+# Streets wind, so road distance is roughly this much longer than a straight line
+ROUTE_DETOUR = 1.3
 
 class TransportationScraper:
-    def __init__(self):
+    def __init__(self, geocoder: Optional[Geocoder] = None):
+        self.geocoder = geocoder or get_default_geocoder()
+        
         # Transportation data for major cities
         self.transportation_data = {
             "Kyoto, Japan": {
@@ -121,31 +156,19 @@ class TransportationScraper:
             "taxi": {"description": "Available in most cities", "cost": "Varies by city"}
         })
     
-    def calculate_travel_time(self, location: str, from_location: str, to_location: str, transport_method: str = "walking") -> Dict[str, Any]:
+    def calculate_travel_time(
+        self,
+        location: str,
+        from_location: str,
+        to_location: str,
+        transport_method: str = "walking",
+        from_coords: Optional[Dict[str, float]] = None,
+        to_coords: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Any]:
         """
-        Calculate realistic travel time between locations
+        Calculate realistic travel time between locations, from real distances
+        when both ends have {'lat', 'lon'} coordinates
         """
-        # Simplified travel time calculations
-        travel_times = {
-            "Kyoto, Japan": {
-                "walking": {"speed": "4 km/h", "description": "Pleasant walking city"},
-                "bus": {"speed": "15 km/h", "description": "Frequent stops, traffic"},
-                "subway": {"speed": "30 km/h", "description": "Fast between stations"},
-                "bicycle": {"speed": "12 km/h", "description": "Popular and efficient"}
-            },
-            "Reykjavik, Iceland": {
-                "walking": {"speed": "4 km/h", "description": "Compact city center"},
-                "bus": {"speed": "20 km/h", "description": "Reliable but limited routes"},
-                "car": {"speed": "40 km/h", "description": "Fastest option"}
-            },
-            "Bali, Indonesia": {
-                "walking": {"speed": "3 km/h", "description": "Hot and humid"},
-                "scooter": {"speed": "25 km/h", "description": "Most popular option"},
-                "taxi": {"speed": "20 km/h", "description": "Traffic dependent"},
-                "bus": {"speed": "15 km/h", "description": "Limited routes, traffic"}
-            }
-        }
-        
         # More realistic distance calculations based on location types
         distances = {
             "temple_to_temple": 2.5,  # km
@@ -159,7 +182,9 @@ class TransportationScraper:
         }
         
         # Estimate distance based on location types and city
-        if "temple" in from_location.lower() or "temple" in to_location.lower():
+        if from_coords and to_coords:
+            estimated_distance = round(haversine_km(from_coords, to_coords) * ROUTE_DETOUR, 1)
+        elif "temple" in from_location.lower() or "temple" in to_location.lower():
             if "kyoto" in location.lower():
                 estimated_distance = distances["kyoto_temple_district"]
             elif "bali" in location.lower():
@@ -176,15 +201,18 @@ class TransportationScraper:
             estimated_distance = distances["city_center_to_attraction"]
         
         # Get transport info for location
-        transport_info = travel_times.get(location, travel_times["Kyoto, Japan"])
+        transport_info = TRAVEL_SPEEDS.get(location, TRAVEL_SPEEDS["Kyoto, Japan"])
         method_info = transport_info.get(transport_method, transport_info["walking"])
         
         # Calculate travel time
         speed_kmh = float(method_info["speed"].split()[0])
         travel_time_minutes = (estimated_distance / speed_kmh) * 60
         
-        # Cap travel time at reasonable limits
-        if travel_time_minutes > 45:
+        if from_coords and to_coords:
+            # Real distances need no cap, but include the time spent waiting
+            travel_time_minutes += WAIT_MINUTES.get(transport_method, 0)
+        elif travel_time_minutes > 45:
+            # Cap estimated travel time at reasonable limits
             travel_time_minutes = 45  # Max 45 minutes for any journey
         
         return {
@@ -198,40 +226,83 @@ class TransportationScraper:
     
     def get_optimal_route(self, location: str, activities: List[Dict]) -> List[Dict[str, Any]]:
         """
-        Get optimal route between activities with realistic travel times
+        Get optimal route between activities with realistic travel times.
+        Activities with coordinates are reordered to minimize total travel time,
+        each leg by its fastest mode; the rest follow in their given order.
         """
         if not activities:
             return []
         
         route = []
-        current_location = "Starting point"
         
-        for i, activity in enumerate(activities):
-            if i == 0:
-                # First activity - assume starting from hotel/city center
-                travel_info = self.calculate_travel_time(
-                    location, 
-                    "Hotel/City Center", 
-                    activity.get("name", "Activity"),
-                    "walking"  # Default to walking for first activity
+        # Known without a network call for cataloged cities; None otherwise
+        city_center = self.geocoder.lookup(location)
+        
+        located = [i for i, activity in enumerate(activities) if activity.get("coordinates")]
+        order = list(range(len(activities)))
+        planner = None
+        if TravelTimes is not None and len(located) >= 2:
+            try:
+                planner = TravelTimes(
+                    [activities[i]["coordinates"] for i in located],
+                    self._route_modes(location),
+                    start=city_center,
+                    detour=ROUTE_DETOUR
                 )
+                best, _ = planner.best_order()
+                unlocated = [i for i in order if not activities[i].get("coordinates")]
+                order = [located[k] for k in best] + unlocated
+            except Exception as e:
+                print(f"Error optimizing route for {location}: {e}")
+                planner = None
+        stop_of = {activity_index: stop for stop, activity_index in enumerate(located)}
+        
+        previous = None
+        for i in order:
+            activity = activities[i]
+            if previous is None:
+                # First activity - assume starting from hotel/city center
+                from_name, from_coords = "Hotel/City Center", city_center
+                method = "walking"  # Default to walking for first activity
             else:
                 # Calculate travel from previous activity
-                prev_activity = activities[i-1]
-                travel_info = self.calculate_travel_time(
-                    location,
-                    prev_activity.get("name", "Previous Activity"),
-                    activity.get("name", "Activity"),
-                    self._get_optimal_transport_method(location, prev_activity, activity)
-                )
+                prev_activity = activities[previous]
+                from_name, from_coords = prev_activity.get("name", "Previous Activity"), prev_activity.get("coordinates")
+                method = self._get_optimal_transport_method(location, prev_activity, activity)
+            
+            # Legs the planner measured use the mode it picked for them
+            if planner and i in stop_of and from_coords:
+                leg = planner.leg(stop_of.get(previous), stop_of[i])
+                if leg:
+                    method = leg[0]
+            
+            travel_info = self.calculate_travel_time(
+                location,
+                from_name,
+                activity.get("name", "Activity"),
+                method,
+                from_coords=from_coords,
+                to_coords=activity.get("coordinates")
+            )
             
             route.append({
                 "activity": activity,
                 "travel_to_activity": travel_info
             })
+            previous = i
         
         return route
     
+    def _route_modes(self, location: str) -> List[tuple]:
+        """
+        (mode, speed in km/h, wait minutes) for every way of getting around a location
+        """
+        transport_info = TRAVEL_SPEEDS.get(location, TRAVEL_SPEEDS["Kyoto, Japan"])
+        return [
+            (method, float(info["speed"].split()[0]), WAIT_MINUTES.get(method, 5))
+            for method, info in transport_info.items()
+        ]
+    
     def _get_optimal_transport_method(self, location: str, from_activity: Dict, to_activity: Dict) -> str:
         """
         Determine optimal transport method based on distance and location
@@ -4,15 +4,65 @@ Weather Scraper for Lumo Travel Recommendations
 Gets current weather conditions and forecasts for travel planning
 """
 
-import requests
+import contextvars
 import json
 import time
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
+from .request_memo import memoized_method
+from .http_client import HttpClient, get_default_client
+from .geocoding import Geocoder, normalize_location
+from .cache import LRUCache
+from .climatology import Climatology, get_default_climatology
+
+# Hand-written best times, preferred over the climatology table where they exist
+CURATED_BEST_TIMES = {
+    "Kyoto, Japan": {
+        "best_months": ["March-May", "October-November"],
+        "reason": "Cherry blossom season and comfortable temperatures",
+        "avoid_months": ["July-August"],
+        "avoid_reason": "Hot and humid with typhoon season"
+    },
+    "Reykjavik, Iceland": {
+        "best_months": ["June-August", "September-March"],
+        "reason": "Summer for outdoor activities, winter for Northern Lights",
+        "avoid_months": ["November-March"],
+        "avoid_reason": "Very cold and limited daylight (unless seeking Northern Lights)"
+    },
+    "Bali, Indonesia": {
+        "best_months": ["April-October"],
+        "reason": "Dry season with pleasant temperatures",
+        "avoid_months": ["November-March"],
+        "avoid_reason": "Rainy season with frequent downpours"
+    }
+}
 
 class WeatherScraper:
-    def __init__(self):
-        self.base_url = "https://api.openweathermap.org/data/2.5"
+    def __init__(
+        self,
+        http_client: Optional[HttpClient] = None,
+        geocoder: Optional[Geocoder] = None,
+        climatology: Optional[Climatology] = None,
+        weather_ttl: float = 600,
+        requests_per_second: float = 1.0,
+        burst: int = 5,
+        max_workers: int = 5
+    ):
+        self.http = http_client or get_default_client()
+        self.geocoder = geocoder or Geocoder(http_client=self.http)
+        self.max_workers = max_workers
+        
+        # Monthly normals and best months per destination, built offline by climatology.py
+        self.climatology = climatology if climatology is not None else get_default_climatology()
+        
+        # Weather goes stale much faster than attractions or tips, so it is cached
+        # on its own short TTL instead of riding along with the hour-long location data
+        self.cache = LRUCache(max_entries=256, max_bytes=4 * 1024 * 1024, ttl=weather_ttl)
+        
+        # The free One Call tier allows 60 calls a minute
+        self.http.rate_limiter.configure("api.openweathermap.org", rate=requests_per_second, burst=burst)
+        self.base_url = "https://api.openweathermap.org/data/3.0"
         self.api_key = None  # Set your OpenWeatherMap API key here
         
         # Fallback weather data for common destinations
@@ -43,145 +93,136 @@ class WeatherScraper:
             }
         }
     
-    def get_current_weather(self, location: str) -> Dict[str, Any]:
+    @memoized_method
+    def get_weather_bundle(self, location: str) -> Dict[str, Any]:
         """
-        Get current weather conditions for a location
-        """
-        try:
-            if not self.api_key:
-                # Use fallback data
-                return self.fallback_weather.get(location, {
-                    "current": {"temp": 20, "condition": "Unknown", "humidity": 70},
-                    "forecast": []
-                })
-            
-            # Get coordinates for the location
-            coords = self._get_coordinates(location)
-            if not coords:
-                return self._get_fallback_weather(location)
-            
-            # Get current weather
-            weather_url = f"{self.base_url}/weather"
-            params = {
-                'lat': coords['lat'],
-                'lon': coords['lon'],
-                'appid': self.api_key,
-                'units': 'metric'
-            }
-            
-            response = requests.get(weather_url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            return {
-                "location": location,
-                "current": {
-                    "temp": data['main']['temp'],
-                    "condition": data['weather'][0]['main'],
-                    "humidity": data['main']['humidity'],
-                    "wind_speed": data['wind']['speed'],
-                    "description": data['weather'][0]['description']
-                },
-                "source": "OpenWeatherMap",
-                "scraped_at": datetime.now().isoformat()
-            }
-            
-        except Exception as e:
-            print(f"Error getting weather for {location}: {e}")
-            return self._get_fallback_weather(location)
-    
-    def get_weather_forecast(self, location: str, days: int = 5) -> Dict[str, Any]:
-        """
-        Get weather forecast for a location
+        Get current conditions, the daily forecast and the best time to visit for a
+        location from a single One Call request, decoded once and shared by every caller
         """
+        cache_key = normalize_location(location)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return dict(cached, location=location)
+        
+        best_time = self.get_best_time_to_visit(location)
+        
         try:
             if not self.api_key:
                 # Use fallback data
                 fallback = self.fallback_weather.get(location, {})
                 return {
                     "location": location,
+                    "current": fallback.get("current", {"temp": 20, "condition": "Unknown", "humidity": 70}),
                     "forecast": fallback.get("forecast", []),
+                    "best_time_to_visit": best_time,
                     "source": "Fallback Data",
                     "scraped_at": datetime.now().isoformat()
                 }
             
-            # Get coordinates
+            # Coordinates come from the gazetteer or the geocoding cache when known
             coords = self._get_coordinates(location)
             if not coords:
-                return self._get_fallback_weather(location)
+                return dict(self._get_fallback_weather(location), best_time_to_visit=best_time)
             
-            # Get forecast
-            forecast_url = f"{self.base_url}/forecast"
+            # One request covers current conditions and the 8 day forecast
             params = {
                 'lat': coords['lat'],
                 'lon': coords['lon'],
                 'appid': self.api_key,
                 'units': 'metric',
-                'cnt': days * 8  # 8 readings per day
+                'exclude': 'minutely,hourly,alerts'
             }
             
-            response = requests.get(forecast_url, params=params)
+            response = self.http.get(f"{self.base_url}/onecall", params=params)
             response.raise_for_status()
             
             data = response.json()
+            current = data['current']
             
-            # Process forecast data
             forecast = []
-            for item in data['list'][:days * 8:8]:  # Get one reading per day
-                date = datetime.fromtimestamp(item['dt'])
+            for day in data.get('daily', []):
                 forecast.append({
-                    "date": date.strftime("%Y-%m-%d"),
-                    "high": item['main']['temp_max'],
-                    "low": item['main']['temp_min'],
-                    "condition": item['weather'][0]['main'],
-                    "description": item['weather'][0]['description'],
-                    "humidity": item['main']['humidity']
+                    "date": datetime.fromtimestamp(day['dt']).strftime("%Y-%m-%d"),
+                    "high": day['temp']['max'],
+                    "low": day['temp']['min'],
+                    "condition": day['weather'][0]['main'],
+                    "description": day['weather'][0]['description'],
+                    "humidity": day['humidity']
                 })
             
-            return {
+            bundle = {
                 "location": location,
+                "current": {
+                    "temp": current['temp'],
+                    "condition": current['weather'][0]['main'],
+                    "humidity": current['humidity'],
+                    "wind_speed": current['wind_speed'],
+                    "description": current['weather'][0]['description']
+                },
                 "forecast": forecast,
+                "best_time_to_visit": best_time,
                 "source": "OpenWeatherMap",
                 "scraped_at": datetime.now().isoformat()
             }
+            self.cache.set(cache_key, bundle)
+            return bundle
             
         except Exception as e:
-            print(f"Error getting forecast for {location}: {e}")
-            return self._get_fallback_weather(location)
+            print(f"Error getting weather for {location}: {e}")
+            return dict(self._get_fallback_weather(location), best_time_to_visit=best_time)
     
-    def get_best_time_to_visit(self, location: str) -> Dict[str, Any]:
+    def get_weather_batch(self, locations: List[str]) -> Dict[str, Dict[str, Any]]:
         """
-        Determine the best time to visit based on weather patterns
+        Get weather bundles for several locations at once, fetching the ones not
+        already cached concurrently. Request pacing is left to the shared rate limiter.
         """
-        # Get historical weather data or use known patterns
-        weather_patterns = {
-            "Kyoto, Japan": {
-                "best_months": ["March-May", "October-November"],
-                "reason": "Cherry blossom season and comfortable temperatures",
-                "avoid_months": ["July-August"],
-                "avoid_reason": "Hot and humid with typhoon season"
-            },
-            "Reykjavik, Iceland": {
-                "best_months": ["June-August", "September-March"],
-                "reason": "Summer for outdoor activities, winter for Northern Lights",
-                "avoid_months": ["November-March"],
-                "avoid_reason": "Very cold and limited daylight (unless seeking Northern Lights)"
-            },
-            "Bali, Indonesia": {
-                "best_months": ["April-October"],
-                "reason": "Dry season with pleasant temperatures",
-                "avoid_months": ["November-March"],
-                "avoid_reason": "Rainy season with frequent downpours"
+        unique = list(dict.fromkeys(location for location in locations if location))
+        if self.max_workers <= 1 or len(unique) < 2:
+            return {location: self.get_weather_bundle(location) for location in unique}
+        
+        workers = min(self.max_workers, len(unique))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="weather") as executor:
+            futures = {
+                location: executor.submit(contextvars.copy_context().run, self.get_weather_bundle, location)
+                for location in unique
             }
+            return {location: future.result() for location, future in futures.items()}
+    
+    def get_current_weather(self, location: str) -> Dict[str, Any]:
+        """
+        Get current weather conditions for a location
+        """
+        bundle = self.get_weather_bundle(location)
+        return {
+            "location": location,
+            "current": bundle["current"],
+            "source": bundle["source"],
+            "scraped_at": bundle["scraped_at"]
         }
-        
-        pattern = weather_patterns.get(location, {
+    
+    def get_weather_forecast(self, location: str, days: int = 5) -> Dict[str, Any]:
+        """
+        Get weather forecast for a location
+        """
+        bundle = self.get_weather_bundle(location)
+        return {
+            "location": location,
+            "forecast": bundle["forecast"][:days],
+            "source": bundle["source"],
+            "scraped_at": bundle["scraped_at"]
+        }
+    
+    def get_best_time_to_visit(self, location: str) -> Dict[str, Any]:
+        """
+        Determine the best time to visit based on weather patterns
+        """
+        # Curated notes first, then the prebuilt climatology table: both plain lookups
+        pattern = CURATED_BEST_TIMES.get(location) or self.climatology.get(location) or {
             "best_months": "Year-round",
             "reason": "Generally good weather throughout the year",
             "avoid_months": "None",
             "avoid_reason": "No major weather concerns"
-        })
+        }
         
         return {
             "location": location,
@@ -193,34 +234,13 @@ class WeatherScraper:
     
     def _get_coordinates(self, location: str) -> Dict[str, float]:
         """
-        Get coordinates for a location using geocoding
+        Get coordinates for a location from the gazetteer or the geocoding cache,
+        geocoding over the network only the first time a location is seen
         """
-        try:
-            if not self.api_key:
-                return None
-            
-            geocode_url = "http://api.openweathermap.org/geo/1.0/direct"
-            params = {
-                'q': location,
-                'limit': 1,
-                'appid': self.api_key
-            }
-            
-            response = requests.get(geocode_url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            if data:
-                return {
-                    'lat': data[0]['lat'],
-                    'lon': data[0]['lon']
-                }
-            
-            return None
-            
-        except Exception as e:
-            print(f"Error getting coordinates for {location}: {e}")
+        if not self.api_key:
             return None
+        
+        return self.geocoder.lookup(location, api_key=self.api_key)
     
     def _get_fallback_weather(self, location: str) -> Dict[str, Any]:
         """
@@ -4,22 +4,64 @@ Wikipedia Scraper for Lumo Travel Recommendations
 Gets real attraction data from Wikipedia pages
 """
 
-import requests
+import contextvars
 import json
 import time
-from typing import Dict, List, Any
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Any, Optional, Tuple
+from urllib.parse import unquote
 import re
+from .request_memo import memo_scope, memoize, memoized_method
+from .http_client import HttpClient, get_default_client
+from .text_classifier import LINK_CLASSIFIER
+from .html_parsing import ParsePool, extract_intro, extract_page, get_default_pool
+from .persistent_cache import SQLiteCache
+from .attraction_index import AttractionIndex
+
+# MediaWiki embeds the rendered revision in the page config
+REVISION_ID_PATTERN = re.compile(rb'"wgRevisionId":(\d+)')
 
 class WikipediaScraper:
-    def __init__(self):
-        self.base_url = "https://en.wikipedia.org"
+    def __init__(
+        self,
+        base_url: str = "https://en.wikipedia.org",
+        max_attractions: int = 10,
+        description_workers: int = 5,
+        use_summary_api: bool = True,
+        http_client: Optional[HttpClient] = None,
+        parse_pool: Optional[ParsePool] = None,
+        page_ttl: float = 24 * 3600,
+        page_retention: float = 30 * 24 * 3600,
+        page_store: Optional[SQLiteCache] = None,
+        attraction_index: Optional[AttractionIndex] = None
+    ):
+        self.http = http_client or get_default_client()
+        self.parse_pool = parse_pool or get_default_pool()
+        
+        # Parsed pages are stored with their ETag, Last-Modified and revision ID.
+        # After page_ttl they are revalidated with a conditional GET instead of
+        # downloaded again; page_retention bounds how long they are kept at all.
+        self.page_ttl = page_ttl
+        self.page_retention = page_retention
+        self.page_store = page_store
+        
+        # Cities ingested from a Wikipedia dump (see dump_ingest) are served
+        # from the local index without any network calls
+        self.attraction_index = attraction_index if attraction_index is not None else AttractionIndex.open_default()
+        self.base_url = base_url
+        self.api_url = f"{base_url}/w/api.php"
+        self.max_attractions = max_attractions
+        self.description_workers = description_workers
+        
+        # Intro extracts come from the MediaWiki query API in batches, with
+        # per-page HTML scraping kept as the fallback
+        self.use_summary_api = use_summary_api
+        self.summary_batch_size = 20  # exlimit cap for exintro extracts
+        self.default_description = "Popular attraction in the area"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         }
         
@@ -29,49 +71,58 @@ class WikipediaScraper:
                 {
                     "name": "Fushimi Inari Shrine",
                     "url": "https://en.wikipedia.org/wiki/Fushimi_Inari-taisha",
-                    "description": "Famous shrine with thousands of torii gates"
+                    "description": "Famous shrine with thousands of torii gates",
+                    "coordinates": {"lat": 34.9671, "lon": 135.7727}
                 },
                 {
                     "name": "Arashiyama Bamboo Grove",
                     "url": "https://en.wikipedia.org/wiki/Arashiyama",
-                    "description": "Serene bamboo forest path"
+                    "description": "Serene bamboo forest path",
+                    "coordinates": {"lat": 35.017, "lon": 135.6713}
                 },
                 {
                     "name": "Kinkaku-ji (Golden Pavilion)",
                     "url": "https://en.wikipedia.org/wiki/Kinkaku-ji",
-                    "description": "Stunning golden temple"
+                    "description": "Stunning golden temple",
+                    "coordinates": {"lat": 35.0394, "lon": 135.7292}
                 },
                 {
                     "name": "Ginkaku-ji (Silver Pavilion)",
                     "url": "https://en.wikipedia.org/wiki/Ginkaku-ji",
-                    "description": "Beautiful temple with moss garden"
+                    "description": "Beautiful temple with moss garden",
+                    "coordinates": {"lat": 35.027, "lon": 135.7982}
                 },
                 {
                     "name": "Nijo Castle",
                     "url": "https://en.wikipedia.org/wiki/Nij%C5%8D_Castle",
-                    "description": "Historic castle with nightingale floors"
+                    "description": "Historic castle with nightingale floors",
+                    "coordinates": {"lat": 35.0142, "lon": 135.7482}
                 }
             ],
             "Reykjavik, Iceland": [
                 {
                     "name": "Blue Lagoon",
                     "url": "https://en.wikipedia.org/wiki/Blue_Lagoon_(geothermal_spa)",
-                    "description": "Famous geothermal spa"
+                    "description": "Famous geothermal spa",
+                    "coordinates": {"lat": 63.8804, "lon": -22.4495}
                 },
                 {
                     "name": "Golden Circle",
                     "url": "https://en.wikipedia.org/wiki/Golden_Circle_(Iceland)",
-                    "description": "Geysers, waterfalls, and national park"
+                    "description": "Geysers, waterfalls, and national park",
+                    "coordinates": {"lat": 64.2559, "lon": -21.1299}
                 },
                 {
                     "name": "Hallgrimskirkja",
                     "url": "https://en.wikipedia.org/wiki/Hallgr%C3%ADmskirkja",
-                    "description": "Iconic church with city views"
+                    "description": "Iconic church with city views",
+                    "coordinates": {"lat": 64.1417, "lon": -21.9266}
                 },
                 {
                     "name": "Harpa Concert Hall",
                     "url": "https://en.wikipedia.org/wiki/Harpa_(concert_hall)",
-                    "description": "Modern glass concert hall"
+                    "description": "Modern glass concert hall",
+                    "coordinates": {"lat": 64.1504, "lon": -21.9325}
                 },
                 {
                     "name": "Northern Lights",
@@ -83,31 +134,107 @@ class WikipediaScraper:
                 {
                     "name": "Ubud Sacred Monkey Forest",
                     "url": "https://en.wikipedia.org/wiki/Ubud_Monkey_Forest",
-                    "description": "Temple complex with monkeys"
+                    "description": "Temple complex with monkeys",
+                    "coordinates": {"lat": -8.5188, "lon": 115.2585}
                 },
                 {
                     "name": "Tegallalang Rice Terraces",
                     "url": "https://en.wikipedia.org/wiki/Tegallalang_Rice_Terraces",
-                    "description": "Stunning rice paddies"
+                    "description": "Stunning rice paddies",
+                    "coordinates": {"lat": -8.4312, "lon": 115.2793}
                 },
                 {
                     "name": "Tanah Lot Temple",
                     "url": "https://en.wikipedia.org/wiki/Tanah_Lot",
-                    "description": "Sea temple on rock formation"
+                    "description": "Sea temple on rock formation",
+                    "coordinates": {"lat": -8.6212, "lon": 115.0868}
                 },
                 {
                     "name": "Uluwatu Temple",
                     "url": "https://en.wikipedia.org/wiki/Uluwatu_Temple",
-                    "description": "Cliff-top temple with ocean views"
+                    "description": "Cliff-top temple with ocean views",
+                    "coordinates": {"lat": -8.8291, "lon": 115.0849}
                 },
                 {
                     "name": "Mount Batur",
                     "url": "https://en.wikipedia.org/wiki/Mount_Batur",
-                    "description": "Active volcano with sunrise hikes"
+                    "description": "Active volcano with sunrise hikes",
+                    "coordinates": {"lat": -8.242, "lon": 115.375}
                 }
             ]
         }
     
+    def _fetch_parsed(
+        self,
+        url: str,
+        kind: str,
+        parse: Callable[[bytes], Any],
+        timeout: int = 15
+    ) -> Tuple[int, Any]:
+        """
+        Download a Wikipedia page and parse it once per request, keyed on URL.
+        Returns (status code, parse result), with None as the result for non-200 pages.
+        """
+        return memoize((f'wikipedia.{kind}', url), lambda: self._load_parsed(url, kind, parse, timeout))
+    
+    def _load_parsed(self, url: str, kind: str, parse: Callable[[bytes], Any], timeout: int) -> Tuple[int, Any]:
+        """
+        Get a parsed page from the page store, revalidating stale entries with a
+        conditional GET. A 304, or a 200 for the same revision, reuses the stored
+        result without parsing.
+        """
+        key = f"{kind}|{url}"
+        entry = self.page_store.get_entry(key) if self.page_store else None
+        stored = entry[1] if entry else None
+        
+        if entry and time.time() - entry[0] < self.page_ttl:
+            return 200, stored['parsed']
+        
+        headers = self.headers
+        if stored:
+            headers = dict(self.headers)
+            if stored.get('etag'):
+                headers['If-None-Match'] = stored['etag']
+            if stored.get('last_modified'):
+                headers['If-Modified-Since'] = stored['last_modified']
+        
+        response = self.http.get(url, headers=headers, timeout=timeout)
+        
+        if response.status_code == 304 and stored:
+            self.page_store.touch(key)
+            return 200, stored['parsed']
+        
+        if response.status_code != 200:
+            return response.status_code, None
+        
+        revid = self._revision_id(response.content)
+        if stored and revid and stored.get('revid') == revid:
+            parsed = stored['parsed']
+        else:
+            parsed = self.parse_pool.run(parse, response.content)
+        
+        if self.page_store:
+            self.page_store.set(key, {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'revid': revid,
+                'parsed': parsed
+            })
+        
+        return 200, parsed
+    
+    def _revision_id(self, markup: bytes) -> Optional[int]:
+        """Get the article revision from the page's wgRevisionId config, if present"""
+        match = REVISION_ID_PATTERN.search(markup)
+        return int(match.group(1)) if match else None
+    
+    def _fetch_document(self, url: str, timeout: int = 15) -> Tuple[int, Optional[Dict[str, list]]]:
+        """
+        Download a Wikipedia page and extract its links and sections once per request
+        """
+        return self._fetch_parsed(url, 'document', extract_page, timeout=timeout)
+    
+    @memoized_method
     def search_attractions(self, location: str) -> List[Dict[str, Any]]:
         """
         Search for attractions in a location using Wikipedia
@@ -117,47 +244,55 @@ class WikipediaScraper:
             location_clean = location.split(',')[0].strip()  # Just the city name
             search_url = f"{self.base_url}/wiki/{location_clean.replace(' ', '_')}"
             
+            indexed = self._indexed_attractions(location_clean)
+            if indexed is not None:
+                print(f"📚 Using local attraction index for: {location_clean}")
+                return indexed or self.fallback_attractions.get(location, [])
+            
             print(f"🔍 Searching Wikipedia for: {location_clean}")
             
-            response = requests.get(search_url, headers=self.headers, timeout=15)
+            status_code, page = self._fetch_document(search_url, timeout=15)
             
-            if response.status_code != 200:
+            if status_code != 200:
                 print(f"⚠️  Wikipedia page not found for {location_clean}, using fallback data")
                 return self.fallback_attractions.get(location, [])
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
+
             # Look for attractions in the main content
             attractions = []
             
-            # Find the main content area
-            content = soup.find('div', {'id': 'mw-content-text'})
-            if not content:
+            # Only the main content area is parsed
+            if not page:
                 print(f"⚠️  No content found for {location_clean}, using fallback data")
                 return self.fallback_attractions.get(location, [])
             
             # Look for links that might be attractions
-            links = content.find_all('a')
+            candidates = []
+            for title, href in page['links']:
+                if len(title) > 3 and href.startswith('/wiki/'):
+                    candidates.append((title, self.base_url + href))
             
-            for link in links:
-                title = link.get_text(strip=True)
-                href = link.get('href', '')
-                
-                if title and href and len(title) > 3 and href.startswith('/wiki/'):
-                    # Check if it's a relevant attraction
-                    if self._is_attraction(title, location_clean):
-                        url = self.base_url + href
-                        attractions.append({
-                            'name': title,
-                            'url': url,
-                            'description': self._get_attraction_description(url),
-                            'source': 'Wikipedia'
-                        })
+            # Classify every candidate title in one batch
+            decisions = self.classify_links([title for title, _ in candidates], location_clean)
+            seen_urls = set()
+            
+            for (title, url), (include, _) in zip(candidates, decisions):
+                if include and url not in seen_urls:
+                    seen_urls.add(url)
+                    attractions.append({
+                        'name': title,
+                        'url': url,
+                        'description': None,  # Filled in once the list is truncated
+                        'source': 'Wikipedia'
+                    })
             
             # If we found real results, use them
             if attractions:
                 print(f"✅ Found {len(attractions)} attractions via Wikipedia")
-                return attractions[:10]  # Limit to top 10
+                # Truncate before fetching so discarded candidates cost nothing
+                attractions = attractions[:self.max_attractions]
+                self._add_descriptions(attractions)
+                return attractions
             
             # Fallback to curated data
             print(f"⚠️  No Wikipedia results found for {location}, using fallback data")
@@ -168,70 +303,188 @@ class WikipediaScraper:
             print(f"Using fallback data for {location}")
             return self.fallback_attractions.get(location, [])
     
+    def _indexed_attractions(self, city: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get a city's attractions from the local index, or None if it isn't indexed
+        """
+        if not self.attraction_index:
+            return None
+        
+        rows = self.attraction_index.get_attractions(city, limit=self.max_attractions)
+        if rows is None:
+            return None
+        
+        return [
+            {
+                'name': row['name'],
+                'url': row['url'],
+                'description': self._pick_description([row['description'] or '']) or self.default_description,
+                'source': 'Wikipedia'
+            }
+            for row in rows
+        ]
+    
     def _is_attraction(self, title: str, location: str) -> bool:
         """
         Check if a Wikipedia link is a relevant attraction
         """
-        # Keywords that indicate attraction/tourist content
-        attraction_keywords = [
-            'temple', 'shrine', 'castle', 'palace', 'museum', 'park', 'garden',
-            'monument', 'landmark', 'tower', 'bridge', 'square', 'market',
-            'cathedral', 'church', 'mosque', 'fortress', 'ruins', 'shrine',
-            'sanctuary', 'pagoda', 'monastery', 'abbey', 'basilica'
-        ]
+        return self.classify_links([title], location)[0][0]
+    
+    def classify_links(self, titles: List[str], location: str) -> List[Tuple[bool, Optional[str]]]:
+        """
+        Decide which link titles are relevant attractions, in one pass over the batch.
+        Returns (include, category) per title, where category is the matched
+        attraction kind, 'exclude', 'location' or None.
+        """
+        location_lower = location.lower()
+        decisions = []
         
-        # Keywords that indicate it's NOT an attraction
-        exclude_keywords = [
-            'airport', 'station', 'hotel', 'restaurant', 'school', 'university',
-            'hospital', 'bank', 'office', 'company', 'corporation', 'district',
-            'prefecture', 'region', 'province', 'country', 'island', 'mountain',
-            'river', 'lake', 'sea', 'ocean', 'bay', 'gulf', 'strait'
-        ]
+        # Exclusion keywords come first, so they win over attraction kinds
+        for title, category in zip(titles, LINK_CLASSIFIER.first_categories(titles)):
+            if category == 'exclude':
+                decisions.append((False, category))
+            elif category:
+                decisions.append((True, category))
+            elif location_lower in title.lower() and len(title) > 5:
+                # If it mentions the location and seems like a place, include it
+                decisions.append((True, 'location'))
+            else:
+                decisions.append((False, None))
+        
+        return decisions
+    
+    def _add_descriptions(self, attractions: List[Dict[str, Any]]) -> None:
+        """
+        Fetch descriptions, and coordinates where the summary API has them,
+        for the given attractions concurrently with a bounded pool
+        """
+        urls = [attraction['url'] for attraction in attractions]
+        pages = self._get_attraction_summaries(urls) if self.use_summary_api else {}
+        summaries = {url: page['description'] for url, page in pages.items() if page['description']}
+        
+        # Only pages the summary API couldn't describe need their HTML fetched
+        missing = [url for url in urls if url not in summaries]
+        if self.description_workers <= 1 or len(missing) < 2:
+            descriptions = [self._get_attraction_description(url) for url in missing]
+        else:
+            workers = min(self.description_workers, len(missing))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wikipedia") as executor:
+                # Copy the context so worker threads see the active request memo
+                futures = [
+                    executor.submit(contextvars.copy_context().run, self._get_attraction_description, url)
+                    for url in missing
+                ]
+                descriptions = [future.result() for future in futures]
+        summaries.update(zip(missing, descriptions))
+        
+        for attraction in attractions:
+            attraction['description'] = summaries[attraction['url']]
+            coordinates = pages.get(attraction['url'], {}).get('coordinates')
+            if coordinates:
+                attraction['coordinates'] = coordinates
+    
+    def _get_attraction_summaries(self, urls: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the intro description and coordinates of many attraction pages from the
+        MediaWiki query API, one request per batch of titles. Either may be None.
+        """
+        titles_by_url = {url: self._title_from_url(url) for url in urls}
+        titles = list(dict.fromkeys(title for title in titles_by_url.values() if title))
         
-        title_lower = title.lower()
+        extracts = {}
+        for i in range(0, len(titles), self.summary_batch_size):
+            batch = tuple(titles[i:i + self.summary_batch_size])
+            extracts.update(memoize(('wikipedia.extracts', batch), lambda: self._fetch_extracts(batch)))
         
-        # Check for exclusion keywords first
-        for keyword in exclude_keywords:
-            if keyword in title_lower:
-                return False
+        summaries = {}
+        for url, title in titles_by_url.items():
+            page = extracts.get(title, {})
+            summaries[url] = {
+                'description': self._pick_description(page.get('extract', '').split('\n')),
+                'coordinates': page.get('coordinates')
+            }
+        return summaries
+    
+    def _fetch_extracts(self, titles: Tuple[str, ...]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch plain-text intro extracts and primary coordinates for up to
+        summary_batch_size titles, keyed by the titles as requested (following
+        normalization and redirects)
+        """
+        params = {
+            'action': 'query',
+            'format': 'json',
+            'formatversion': '2',
+            'prop': 'extracts|coordinates',
+            'exintro': '1',
+            'explaintext': '1',
+            'exlimit': 'max',
+            'colimit': 'max',
+            'redirects': '1',
+            'titles': '|'.join(titles)
+        }
         
-        # Check for attraction keywords
-        for keyword in attraction_keywords:
-            if keyword in title_lower:
-                return True
+        try:
+            response = self.http.get(self.api_url, params=params, headers=self.headers, timeout=10)
+            response.raise_for_status()
+            query = response.json().get('query', {})
+        except Exception as e:
+            print(f"Error getting Wikipedia summaries: {e}")
+            return {}
         
-        # If it mentions the location and seems like a place, include it
-        if location.lower() in title_lower and len(title) > 5:
-            return True
+        # Map each requested title through normalization and redirects to its page
+        resolved = {title: title for title in titles}
+        for mapping in query.get('normalized', []) + query.get('redirects', []):
+            for title, target in resolved.items():
+                if target == mapping.get('from'):
+                    resolved[title] = mapping.get('to')
         
-        return False
+        pages = {}
+        for page in query.get('pages', []):
+            if page.get('missing') or page.get('invalid'):
+                continue
+            coordinates = page.get('coordinates') or []
+            pages[page.get('title')] = {
+                'extract': page.get('extract', ''),
+                'coordinates': {'lat': coordinates[0]['lat'], 'lon': coordinates[0]['lon']} if coordinates else None
+            }
+        return {title: pages[target] for title, target in resolved.items() if target in pages}
+    
+    def _title_from_url(self, url: str) -> Optional[str]:
+        """Get the page title from a /wiki/ URL"""
+        if '/wiki/' not in url:
+            return None
+        title = url.split('/wiki/', 1)[1].split('#', 1)[0]
+        return unquote(title).replace('_', ' ') or None
+    
+    def _pick_description(self, paragraphs: Iterable[str]) -> Optional[str]:
+        """
+        Get the first real paragraph, trimmed to a short description
+        """
+        for paragraph in paragraphs:
+            text = paragraph.strip()
+            if len(text) > 50 and not text.startswith('This article'):
+                return text[:200] + "..." if len(text) > 200 else text
+        return None
     
     def _get_attraction_description(self, url: str) -> str:
         """
         Get brief description of an attraction from its Wikipedia page
         """
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            if response.status_code != 200:
-                return "Popular attraction in the area"
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # Paragraphs are streamed until the first usable one, without building a tree
+            status_code, intro = self._fetch_parsed(url, 'intro', extract_intro, timeout=10)
+            if status_code != 200:
+                return self.default_description
             
-            # Try to find the first paragraph
-            content = soup.find('div', {'id': 'mw-content-text'})
-            if content:
-                paragraphs = content.find_all('p')
-                for p in paragraphs:
-                    text = p.get_text(strip=True)
-                    if len(text) > 50 and not text.startswith('This article'):
-                        return text[:200] + "..." if len(text) > 200 else text
-            
-            return "Popular attraction in the area"
+            description = self._pick_description([intro] if intro else [])
+            return description or self.default_description
             
         except Exception as e:
             print(f"Error getting description for {url}: {e}")
-            return "Popular attraction in the area"
+            return self.default_description
     
+    @memoized_method
     def search_local_insights(self, location: str) -> List[Dict[str, Any]]:
         """
         Search for local insights from Wikipedia
@@ -240,31 +493,28 @@ class WikipediaScraper:
             location_clean = location.split(',')[0].strip()
             search_url = f"{self.base_url}/wiki/{location_clean.replace(' ', '_')}"
             
-            response = requests.get(search_url, headers=self.headers, timeout=15)
-            
-            if response.status_code != 200:
-                return []
+            # Indexed cities already have their sections locally
+            sections = self.attraction_index.get_sections(location_clean) if self.attraction_index else None
+            if sections is None:
+                status_code, page = self._fetch_document(search_url, timeout=15)
+                
+                if status_code != 200:
+                    return []
+                
+                sections = page['sections'] if page else []
             
-            soup = BeautifulSoup(response.content, 'html.parser')
             insights = []
             
             # Look for sections about culture, history, or local customs
-            content = soup.find('div', {'id': 'mw-content-text'})
-            if content:
-                sections = content.find_all(['h2', 'h3'])
-                
-                for section in sections:
-                    section_text = section.get_text().lower()
-                    if any(keyword in section_text for keyword in ['culture', 'history', 'custom', 'tradition', 'local', 'heritage']):
-                        # Get the next few paragraphs after this section
-                        next_elem = section.find_next_sibling()
-                        if next_elem and next_elem.name == 'p':
-                            text = next_elem.get_text(strip=True)
-                            if len(text) > 100:
-                                insights.append({
-                                    'source': 'Wikipedia',
-                                    'tip': f"{section.get_text()}: {text[:150]}..."
-                                })
+            for heading, text in sections:
+                section_text = heading.lower()
+                if any(keyword in section_text for keyword in ['culture', 'history', 'custom', 'tradition', 'local', 'heritage']):
+                    # Use the paragraph right after this section's heading
+                    if len(text) > 100:
+                        insights.append({
+                            'source': 'Wikipedia',
+                            'tip': f"{heading}: {text[:150]}..."
+                        })
             
             return insights[:5]  # Limit to top 5 insights
             
@@ -272,12 +522,15 @@ class WikipediaScraper:
             print(f"Error searching local insights for {location}: {e}")
             return []
     
+    @memoized_method
     def get_location_attractions(self, location: str) -> Dict[str, Any]:
         """
         Get comprehensive attraction data for a location
         """
-        attractions = self.search_attractions(location)
-        local_insights = self.search_local_insights(location)
+        # Both searches read the same city page, so share one download and parse
+        with memo_scope():
+            attractions = self.search_attractions(location)
+            local_insights = self.search_local_insights(location)
         
         return {
             "location": location,
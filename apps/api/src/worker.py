@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Long-lived Python worker for the Lumo API
+Reads newline-delimited JSON requests on stdin (or a Unix socket) and streams
+back JSON responses, so imports, caches and HTTP connections stay warm across
+requests instead of paying for a fresh interpreter every time
+
+Request:  {"id": "1", "method": "generate_itinerary", "params": {...}}
+Response: {"id": "1", "result": {...}} or {"id": "1", "error": "..."}
+
+Run from apps/api with:
+    python -m src.worker                      # stdin/stdout
+    python -m src.worker --socket /tmp/lumo.sock
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, IO, Optional
+
+from .scrapers.scraper_manager import ScraperManager
+
+# Methods served by DeepSeekAgent, mapped to its handle_api_call method names
+AGENT_METHODS = {
+    "analyze_response": "analyze_response",
+    "generate_preferences": "generate_preferences",
+    "suggest_locations": "suggest_locations",
+    "generate_ai_itinerary": "generate_itinerary"
+}
+
+# How often a long-running worker clears expired rows out of the disk cache
+PURGE_INTERVAL = 3600
+
+class Worker:
+    def __init__(self, max_threads: int = 4):
+        self.scraper_manager = ScraperManager()
+        self.executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="worker")
+        self._agent = None
+        self._agent_lock = threading.Lock()
+
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "ping": lambda params: {"pong": True},
+            "stats": self._stats,
+            "generate_itinerary": self._generate_itinerary
+        }
+
+    def _get_agent(self):
+        """
+        Build the DeepSeek agent on first use, sharing the worker's scraper manager
+        """
+        with self._agent_lock:
+            if self._agent is None:
+                api_key = os.getenv("DEEPSEEK_API_KEY")
+                if not api_key:
+                    raise RuntimeError("DEEPSEEK_API_KEY not set")
+
+                from .deepseek_agent import DeepSeekAgent
+                self._agent = DeepSeekAgent(api_key, scraper_manager=self.scraper_manager)
+            return self._agent
+
+    def _generate_itinerary(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Same contract as `python -m src.scrapers.scraper_manager generate_itinerary`"""
+        location = params.get('location')
+        if not location:
+            raise ValueError("Location not provided")
+
+        print("🔍 Generating itinerary for:", location)
+        return self.scraper_manager.calculate_realistic_itinerary(location, params.get('user_preferences', {}))
+
+    def _stats(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "location_cache": self.scraper_manager.cache.stats(),
+            "reddit_posts": self.scraper_manager.reddit_scraper.post_store.stats(),
+            "failed_lookups": self.scraper_manager.http_client.negative_cache.stats()
+        }
+
+    def start_cache_purge(self, interval: float = PURGE_INTERVAL) -> None:
+        """
+        Purge expired disk cache rows every interval seconds on a daemon thread,
+        since the stores only clean up when they are opened
+        """
+        def purge_forever() -> None:
+            while True:
+                time.sleep(interval)
+                removed = self.scraper_manager.purge_disk_cache()
+                if removed:
+                    print(f"🧹 Purged {removed} expired disk cache entries")
+
+        threading.Thread(target=purge_forever, name="cache-purge", daemon=True).start()
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Dispatch a single request and build its response
+        """
+        request_id = request.get('id')
+        method = request.get('method', '')
+        params = request.get('params') or {}
+
+        try:
+            if method in AGENT_METHODS:
+                from .deepseek_agent import dispatch_api_call
+                result = dispatch_api_call(self._get_agent(), AGENT_METHODS[method], params)
+            elif method in self.handlers:
+                result = self.handlers[method](params)
+            else:
+                raise ValueError(f"Unknown method: {method}")
+
+            return {"id": request_id, "result": result}
+
+        except Exception as e:
+            print(f"❌ Error handling {method} request {request_id}: {e}")
+            return {"id": request_id, "error": str(e)}
+
+    def serve(self, input_stream: IO[str], output_stream: IO[str]) -> None:
+        """
+        Serve requests from a line-oriented stream until EOF.
+        Requests run concurrently, so responses may come back out of order.
+        """
+        write_lock = threading.Lock()
+
+        def respond(response: Dict[str, Any]) -> None:
+            line = json.dumps(response, default=str)
+            with write_lock:
+                output_stream.write(line + "\n")
+                output_stream.flush()
+
+        def run(request: Dict[str, Any]) -> None:
+            respond(self.handle(request))
+
+        pending = []
+        for line in input_stream:
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Request must be a JSON object")
+            except ValueError as e:
+                respond({"id": None, "error": f"Invalid JSON request: {e}"})
+                continue
+
+            pending.append(self.executor.submit(run, request))
+            pending = [future for future in pending if not future.done()]
+
+        for future in pending:
+            future.result()
+
+    def serve_socket(self, socket_path: str) -> None:
+        """Serve the same protocol on a Unix socket, one stream per connection"""
+        worker = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                reader = (line.decode('utf-8') for line in self.rfile)
+                writer = _SocketWriter(self.wfile)
+                worker.serve(reader, writer)
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+        with socketserver.ThreadingUnixStreamServer(socket_path, Handler) as server:
+            print(f"🚀 Lumo worker listening on {socket_path}")
+            server.serve_forever()
+
+class _SocketWriter:
+    """Text-mode adapter over a socket's binary write file"""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, text: str) -> None:
+        self.wfile.write(text.encode('utf-8'))
+
+    def flush(self) -> None:
+        self.wfile.flush()
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Lumo Python worker (JSON lines protocol)")
+    parser.add_argument("--socket", help="Serve on this Unix socket path instead of stdin/stdout")
+    parser.add_argument("--threads", type=int, default=int(os.getenv("LUMO_WORKER_THREADS", "4")),
+                        help="Maximum number of requests handled concurrently")
+    args = parser.parse_args(argv)
+
+    # Scrapers log progress with print(), so keep stdout clean for protocol messages.
+    # Replies go to a private copy of the protocol pipe, and fd 1 itself is pointed
+    # at stderr so child processes (like the parse pool) can't write into the stream.
+    sys.stdout.flush()
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8', buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+    worker = Worker(max_threads=args.threads)
+    worker.start_cache_purge()
+    if args.socket:
+        worker.serve_socket(args.socket)
+    else:
+        print("🚀 Lumo worker ready on stdin")
+        worker.serve(sys.stdin, protocol_out)
+
+if __name__ == "__main__":
+    main()